@@ -1,12 +1,16 @@
 from __future__ import absolute_import, division, print_function
 
 import argparse
+import json
+import multiprocessing
 import os
-from PIL import Image
+import time
+from concurrent.futures import ThreadPoolExecutor
 import imageio.v2 as imageio
 import numpy as np
 from ultralytics import YOLO
 import cv2
+from dataset_index import load_index
 
 # -------------------------------
 # Helper Classes and Functions
@@ -18,18 +22,10 @@ class ImageClass:
         self.image_paths = image_paths
 
 def get_dataset(input_dir):
+    index = load_index(input_dir)
     dataset = []
-    input_dir = os.path.expanduser(input_dir)
-    class_names = sorted(os.listdir(input_dir))
-
-    for class_name in class_names:
-        class_path = os.path.join(input_dir, class_name)
-        if not os.path.isdir(class_path):
-            continue
-        image_paths = []
-        for file_name in os.listdir(class_path):
-            if file_name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                image_paths.append(os.path.join(class_path, file_name))
+    for class_name in index.persons():
+        image_paths = [entry.path for entry in index.entries(class_name)]
         if image_paths:
             dataset.append(ImageClass(class_name, image_paths))
 
@@ -39,6 +35,109 @@ def to_rgb(img):
     """Convert grayscale image to RGB by stacking channels"""
     return np.stack((img,) * 3, axis=-1)
 
+def load_image(image_path, size=640):
+    """Decode and resize one image to size x size, returned as BGR (what YOLO expects for arrays)."""
+    img = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if img is None:  # formats OpenCV can't decode
+        img = imageio.imread(image_path)
+        if img.ndim == 2:  # Grayscale image
+            img = to_rgb(img)
+        img = np.ascontiguousarray(img[:, :, 2::-1])  # Ensure 3 channels, RGB -> BGR
+    return cv2.resize(img, (size, size))
+
+def write_label(label_path, boxes, class_id, img_width, img_height):
+    with open(label_path, "w") as label_file:
+        for box in boxes:
+            x1, y1, x2, y2 = box[:4]
+            x_center = ((x1 + x2) / 2) / img_width
+            y_center = ((y1 + y2) / 2) / img_height
+            width = (x2 - x1) / img_width
+            height = (y2 - y1) / img_height
+
+            # Write the class ID and normalized bounding box values to the label file
+            label_file.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+
+# -------------------------------
+# Labeling Engine
+# -------------------------------
+
+class Labeler:
+    """One model + one decode thread pool. label() runs a single batched inference per batch of images."""
+
+    def __init__(self, weights, size=640, device=None, threads=4):
+        self.model = YOLO(weights)
+        self.size = size
+        self.device = device
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def decode(self, jobs):
+        """Start decoding a batch in the thread pool; returns futures in job order."""
+        return [self.pool.submit(self._load, job[0]) for job in jobs]
+
+    def _load(self, image_path):
+        try:
+            return load_image(image_path, self.size)
+        except Exception as e:
+            print(f"Failed to read {image_path}: {e}")
+            return None
+
+    def label(self, jobs, decoded=None):
+        """jobs: (image_path, label_path, class_id). Returns (image_path, status, box_count) per job."""
+        images = [future.result() for future in (decoded or self.decode(jobs))]
+        ok = [i for i, img in enumerate(images) if img is not None]
+        outcomes = [(job[0], "error", 0) for job in jobs]
+        if not ok:
+            return outcomes
+
+        results = self.model.predict([images[i] for i in ok], device=self.device, verbose=False)
+        for i, result in zip(ok, results):
+            image_path, label_path, class_id = jobs[i]
+            boxes = result.boxes.xyxy.cpu().numpy() if result.boxes is not None else []
+            if len(boxes) == 0:
+                print(f"No face detected in {image_path}.")
+                outcomes[i] = (image_path, "no_face", 0)
+                continue
+            write_label(label_path, boxes, class_id, self.size, self.size)
+            outcomes[i] = (image_path, "labeled", len(boxes))
+            print(f"Labeled: {image_path} → {label_path}")
+        return outcomes
+
+_labeler = None
+
+def init_worker(weights, size, device, threads):
+    global _labeler
+    _labeler = Labeler(weights, size, device, threads)
+
+def label_batch(jobs):
+    return _labeler.label(jobs)
+
+def run_in_process(labeler, batches):
+    """Single process: decode batch i+1 in the thread pool while batch i is on the model."""
+    decoded = labeler.decode(batches[0]) if batches else None
+    for i, jobs in enumerate(batches):
+        current = decoded
+        decoded = labeler.decode(batches[i + 1]) if i + 1 < len(batches) else None
+        yield labeler.label(jobs, current)
+
+# -------------------------------
+# Progress Manifest
+# -------------------------------
+
+MANIFEST_NAME = 'labeling_manifest.jsonl'
+
+def load_manifest(manifest_path):
+    """image path -> last recorded status, so an interrupted run resumes where it stopped."""
+    done = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                done[entry['image']] = entry['status']
+    return done
+
 # -------------------------------
 # Main Function
 # -------------------------------
@@ -46,74 +145,63 @@ def to_rgb(img):
 def main(args):
     dataset = get_dataset(args.input_dir)
 
-    model = YOLO('yolov11n-face.pt')  # You can replace this with any other YOLOv8 model
-
-    total_images = 0
-    total_labeled = 0
-
     # Create a dictionary to map person names to class IDs
     class_name_to_id = {cls.name: idx for idx, cls in enumerate(dataset)}
 
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    done = {} if args.restart else load_manifest(manifest_path)
+
+    total_images = 0
+    skipped = 0
+    jobs = []
     for cls in dataset:
         output_class_dir = os.path.join(args.output_dir, cls.name)
         os.makedirs(output_class_dir, exist_ok=True)
 
-        for image_path in cls.image_paths:
+        for image_path in sorted(cls.image_paths):
             total_images += 1
             filename = os.path.splitext(os.path.basename(image_path))[0]
             label_path = os.path.join(output_class_dir, f"{filename}.txt")
 
-            if os.path.exists(label_path):
-                print(f"Label already exists for {filename}, skipping.")
-                continue
-
-            try:
-                img = imageio.imread(image_path)
-            except Exception as e:
-                print(f"Failed to read {image_path}: {e}")
-                continue
-
-            if img.ndim == 2:  # Grayscale image
-                img = to_rgb(img)
-            img = img[:, :, 0:3]  # Ensure 3 channels
-            resized_img = cv2.resize(img, (640, 640))
-            img_height, img_width = resized_img.shape[:2]
-
-            image_pil = Image.fromarray(resized_img)
-            detections = []
-            for _ in range(7):
-                result = model(image_pil)[0]
-                boxes = result.boxes.xyxy.cpu().numpy() if result.boxes is not None else []
-                if len(boxes) > 0:
-                    detections.append(boxes)
-
-            # If no detections after 10 tries, skip this image
-            if len(detections) < 2:
-                print(f"No face detected in {image_path} after 10 attempts.")
+            if os.path.exists(label_path) or done.get(image_path) == "no_face":
+                skipped += 1
                 continue
-
-            # Use detections from the last successful detection
-            boxes = detections[-1]
-
-            # Get the class ID for the current person (based on the folder name)
-            class_id = class_name_to_id[cls.name]
-
-            with open(label_path, "w") as label_file:
-                for box in boxes:
-                    x1, y1, x2, y2 = box[:4]
-                    x_center = ((x1 + x2) / 2) / img_width
-                    y_center = ((y1 + y2) / 2) / img_height
-                    width = (x2 - x1) / img_width
-                    height = (y2 - y1) / img_height
-
-                    # Write the class ID and normalized bounding box values to the label file
-                    label_file.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
-
-            total_labeled += 1
-            print(f"Labeled: {image_path} → {label_path}")
-
+            jobs.append((image_path, label_path, class_name_to_id[cls.name]))
+
+    print(f"{total_images} images, {skipped} already done, {len(jobs)} to label.")
+    batches = [jobs[i:i + args.batch_size] for i in range(0, len(jobs), args.batch_size)]
+
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers, initializer=init_worker,
+                                    initargs=(args.weights, args.imgsz, args.device, args.threads))
+        results = pool.imap_unordered(label_batch, batches)
+    else:
+        results = run_in_process(Labeler(args.weights, args.imgsz, args.device, args.threads), batches)
+
+    counts = {"labeled": 0, "no_face": 0, "error": 0}
+    processed = 0
+    start = time.perf_counter()
+    try:
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            for outcomes in results:
+                for image_path, status, boxes in outcomes:
+                    counts[status] += 1
+                    manifest.write(json.dumps({"image": image_path, "status": status, "boxes": boxes}) + "\n")
+                manifest.flush()
+                processed += len(outcomes)
+                elapsed = time.perf_counter() - start
+                print(f"[{processed}/{len(jobs)}] {processed / elapsed:.1f} images/sec")
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    elapsed = time.perf_counter() - start
     print(f"\nProcessed {total_images} images.")
-    print(f"Successfully labeled {total_labeled} images.")
+    print(f"Successfully labeled {counts['labeled']} images ({counts['no_face']} without a face, {counts['error']} unreadable).")
+    if processed:
+        print(f"Throughput: {processed / elapsed:.1f} images/sec")
 
 # -------------------------------
 # CLI Argument Parsing
@@ -123,6 +211,13 @@ def get_arguments():
     parser = argparse.ArgumentParser()
     parser.add_argument('--input_dir', type=str, default='./train', help='Directory with class-based image folders.')
     parser.add_argument('--output_dir', type=str, default='./labels', help='Directory to save YOLO label files.')
+    parser.add_argument('--weights', type=str, default='yolov11n-face.pt', help='Face detector used for labeling.')
+    parser.add_argument('--imgsz', type=int, default=640, help='Images are resized to imgsz x imgsz before labeling.')
+    parser.add_argument('--batch_size', type=int, default=16, help='Images per model call.')
+    parser.add_argument('--workers', type=int, default=1, help='Labeling processes (each loads its own model).')
+    parser.add_argument('--threads', type=int, default=4, help='Decode threads per process.')
+    parser.add_argument('--device', type=str, default=None, help='e.g. cpu, 0')
+    parser.add_argument('--restart', action='store_true', help='Ignore the progress manifest and retry images without a face.')
     return parser.parse_args()
 
 # -------------------------------
@@ -1,14 +1,13 @@
 import cv2
 import numpy as np
 
+BLUR_THRESHOLD = 100
+LOW_THRESHOLD = 50
+HIGH_THRESHOLD = 200
 
-def analyze_image(image_path):
-    # Read the image
-    img = cv2.imread(image_path)
-    if img is None:
-        print("Error: Could not load image")
-        return
 
+def image_metrics(img):
+    """Blur and lighting metrics of a BGR image, without any display."""
     # Convert to grayscale
     img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
@@ -20,24 +19,41 @@ def analyze_image(image_path):
 
     # Determine if the image is blurry
     text_blur = "Not Blurry"
-    blur_threshold = 100
-    if variation < blur_threshold:
+    if variation < BLUR_THRESHOLD:
         text_blur = "Blurry"
 
     # Compute the average brightness for lighting condition
     mean_brightness = np.mean(img_gray)
-    low_threshold = 50
-    high_threshold = 200
 
     # Determine lighting condition
-    if mean_brightness < low_threshold:
+    if mean_brightness < LOW_THRESHOLD:
         lighting_condition = "Too Dark"
-    elif mean_brightness > high_threshold:
+    elif mean_brightness > HIGH_THRESHOLD:
         lighting_condition = "Too Bright"
     else:
         lighting_condition = "Good Lighting"
 
-    print(f"Standard Deviation: {std_deviation}")
+    return {
+        "std_deviation": float(std_deviation),
+        "variation": float(variation),
+        "blur": text_blur,
+        "mean_brightness": float(mean_brightness),
+        "lighting": lighting_condition,
+    }
+
+
+def analyze_image(image_path):
+    # Read the image
+    img = cv2.imread(image_path)
+    if img is None:
+        print("Error: Could not load image")
+        return
+
+    metrics = image_metrics(img)
+    text_blur, variation = metrics["blur"], metrics["variation"]
+    lighting_condition, mean_brightness = metrics["lighting"], metrics["mean_brightness"]
+
+    print(f"Standard Deviation: {metrics['std_deviation']}")
     print(f"Variation: {variation}")
     print(f"Blur Detection: {text_blur}")
     print(f"Average Brightness: {mean_brightness}")
@@ -53,5 +69,6 @@ def analyze_image(image_path):
     cv2.destroyAllWindows()
 
 
-# Test with a sample image
-analyze_image("maxresdefault.jpg")
+if __name__ == '__main__':
+    # Test with a sample image
+    analyze_image("maxresdefault.jpg")
@@ -1,13 +1,207 @@
+import argparse
+import hashlib
 import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-def crop_faces(image_path, output_folder):
-    image = cv2.imread(image_path)
-    results = model(image)
+import cv2
+import numpy as np
+from ultralytics import YOLO
 
-    for i, box in enumerate(results[0].boxes.xyxy):
-        x1, y1, x2, y2 = map(int, box)  # Convert bounding box to integer
-        face = image[y1:y2, x1:x2]  # Crop face
-        cv2.imwrite(f"{output_folder}/face_{i}.jpg", face)
+DEFAULT_WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                               'runs', 'detect', 'yolo11_face_final', 'weights', 'best.pt')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
 
-os.makedirs("cropped_faces", exist_ok=True)
-crop_faces("input.jpg", "cropped_faces")
+_eye_cascade = None
+
+
+# --- Sources: every source yields (person, tag, frame) ---
+def source_tag(path):
+    """File stem plus a short hash of its folder: same-named files from different folders
+    (e.g. --person X dirA dirB) get different crop names, reruns get the same ones."""
+    folder = os.path.dirname(os.path.abspath(path))
+    return f"{os.path.splitext(os.path.basename(path))[0]}_{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:6]}"
+
+
+def list_images(folder):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def image_frames(jobs, threads, prefetch=64):
+    """jobs: (person, image_path). Decoded on a thread pool, at most `prefetch` ahead, yielded in order."""
+    pending = deque()
+    jobs = iter(jobs)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while True:
+            for person, path in islice(jobs, prefetch - len(pending)):
+                pending.append((person, path, pool.submit(cv2.imread, path)))
+            if not pending:
+                return
+            person, path, future = pending.popleft()
+            frame = future.result()
+            if frame is None:
+                print(f"Failed to read {path}")
+                continue
+            yield person, source_tag(path), frame
+
+
+def video_frames(person, path, every):
+    """Every `every`-th frame of a video; decoding runs on its own thread, ahead of inference."""
+    frames = queue.Queue(maxsize=64)
+    stem = source_tag(path)
+
+    def reader():
+        cap = cv2.VideoCapture(path)
+        idx = 0
+        while True:
+            if idx % every:
+                if not cap.grab():  # skipped frames are not decoded
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.put((person, f"{stem}_{idx:07d}", frame))
+            idx += 1
+        cap.release()
+        frames.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        item = frames.get()
+        if item is None:
+            return
+        yield item
+
+
+def iter_sources(args):
+    """Folders of images, person folders (root/<person>/...) or video files."""
+    image_jobs = []
+    for source in args.sources:
+        if os.path.isfile(source) and source.lower().endswith(VIDEO_EXTENSIONS):
+            yield from video_frames(args.person or os.path.splitext(os.path.basename(source))[0], source, args.every)
+        elif args.person:
+            image_jobs.extend((args.person, path) for path in list_images(source))
+        else:
+            for person in sorted(os.listdir(source)):
+                person_dir = os.path.join(source, person)
+                if os.path.isdir(person_dir):
+                    images_dir = os.path.join(person_dir, 'images')
+                    folder = images_dir if os.path.isdir(images_dir) else person_dir
+                    image_jobs.extend((person, path) for path in list_images(folder))
+    yield from image_frames(image_jobs, args.threads)
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Crop rules ---
+def expand_box(box, margin, width, height):
+    """Square crop around the box, grown by margin on every side (DeepFace re-detects inside it)."""
+    x1, y1, x2, y2 = box
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    side = max(x2 - x1, y2 - y1) * (1 + 2 * margin)
+    x1, y1 = int(max(cx - side / 2, 0)), int(max(cy - side / 2, 0))
+    x2, y2 = int(min(cx + side / 2, width)), int(min(cy + side / 2, height))
+    return x1, y1, x2, y2
+
+
+def align_crop(crop):
+    """Rotate so the eyes are level. Uses OpenCV's eye cascade as landmarks; unchanged if two eyes aren't found."""
+    global _eye_cascade
+    if _eye_cascade is None:
+        _eye_cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, 'haarcascade_eye.xml'))
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    eyes = _eye_cascade.detectMultiScale(gray[:h // 2], scaleFactor=1.1, minNeighbors=5)
+    if len(eyes) < 2:
+        return crop
+    eyes = sorted(eyes, key=lambda e: e[2] * e[3], reverse=True)[:2]
+    (lx, ly), (rx, ry) = sorted((x + ew / 2, y + eh / 2) for x, y, ew, eh in eyes)
+    angle = np.degrees(np.arctan2(ry - ly, rx - lx))
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(crop, matrix, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+
+# --- Main Function ---
+def main(args):
+    model = YOLO(args.weights)
+    writer = ThreadPoolExecutor(max_workers=2)
+    counts = {}
+    frames_seen = 0
+    start = time.perf_counter()
+
+    for batch in batches(iter_sources(args), args.batch_size):
+        # The trained model has one class per person; here every class just means "face"
+        results = model.predict([frame for _, _, frame in batch], imgsz=args.imgsz, conf=args.conf,
+                                device=args.device, agnostic_nms=True, verbose=False)
+        for (person, tag, frame), result in zip(batch, results):
+            frames_seen += 1
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            boxes = result.boxes.xyxy.cpu().numpy()
+            if args.single and len(boxes) > 1:
+                continue  # backend registration only accepts one face per image
+            if not args.all_faces:
+                # Crops are enrolled as --person: keep the subject (largest face), not bystanders
+                boxes = boxes[[np.argmax((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]))]]
+            height, width = frame.shape[:2]
+            person_dir = os.path.join(args.output_dir, person)
+            os.makedirs(person_dir, exist_ok=True)
+            for i, box in enumerate(boxes):
+                if min(box[2] - box[0], box[3] - box[1]) < args.min_size:
+                    continue
+                x1, y1, x2, y2 = expand_box(box, args.margin, width, height)
+                face = frame[y1:y2, x1:x2].copy()  # don't keep the whole frame alive in the writer queue
+                if args.align:
+                    face = align_crop(face)
+                # <source>_<folder hash>[_<frame>]_<face>.jpg: unique per source, so reruns overwrite instead of piling up
+                writer.submit(cv2.imwrite, os.path.join(person_dir, f"{tag}_{i}.jpg"), face)
+                counts[person] = counts.get(person, 0) + 1
+
+        elapsed = time.perf_counter() - start
+        print(f"{frames_seen} frames, {sum(counts.values())} crops, {frames_seen / elapsed:.1f} frames/sec")
+
+    writer.shutdown(wait=True)
+    for person, count in sorted(counts.items()):
+        print(f"  {person}: {count} crops")
+    print(f"Crops written to {args.output_dir} (faces_db layout: <person>/<image>.jpg)")
+
+
+# --- CLI Argument Parsing ---
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Crop faces in bulk with the trained YOLO face detector.')
+    parser.add_argument('sources', nargs='+', help='Video files, image folders (with --person) or person-folder roots.')
+    parser.add_argument('--person', type=str, default='', help='Name for all crops (default: folder or video name).')
+    parser.add_argument('--output_dir', type=str, default='cropped_faces', help='e.g. ../../smart-home-backend/faces_db')
+    parser.add_argument('--weights', type=str, default=DEFAULT_WEIGHTS)
+    parser.add_argument('--device', type=str, default=None, help='e.g. cpu, 0')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--conf', type=float, default=0.46)
+    parser.add_argument('--batch_size', type=int, default=16, help='Frames per model call.')
+    parser.add_argument('--threads', type=int, default=4, help='Image decode threads.')
+    parser.add_argument('--every', type=int, default=5, help='Use every N-th video frame.')
+    parser.add_argument('--margin', type=float, default=0.3, help='Extra context around the face box, per side.')
+    parser.add_argument('--min_size', type=int, default=60, help='Skip faces smaller than this (px).')
+    parser.add_argument('--single', action='store_true', help='Skip frames with more than one face.')
+    parser.add_argument('--all_faces', action='store_true',
+                        help='Save every face in a frame (default: only the largest, the subject).')
+    parser.add_argument('--align', action='store_true', help='Level the eyes before saving.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
@@ -7,7 +7,43 @@ import threading
 import imutils
 import cv2
 import os
-import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from quality import analyze_frame, BestFrames
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_bus import open_capture
+
+
+class ImageWriter:
+    """Background JPEG encoding + saving. At most max_pending frames wait in memory;
+    beyond that save() blocks the capture thread (never the preview)."""
+
+    def __init__(self, workers=2, max_pending=64):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending = {}
+
+    def save(self, path, frame):
+        self.slots.acquire()
+        future = self.pool.submit(cv2.imwrite, path, frame)
+        self.pending[path] = future
+        future.add_done_callback(lambda _: self._done(path))
+
+    def _done(self, path):
+        self.pending.pop(path, None)
+        self.slots.release()
+
+    def remove(self, path):
+        """Delete a saved file, after its write has finished if it is still queued."""
+        future = self.pending.get(path)
+        if future is None:
+            os.remove(path)
+        else:
+            future.add_done_callback(lambda _: os.remove(path))
+
+    def close(self):
+        self.pool.shutdown(wait=True)
 
 
 class Gui:
@@ -17,6 +53,10 @@ class Gui:
         self.init_height = 640
         self.capture_idx = 0
         self.batch_size = 500
+        self.oversample = 2  # look at 2x batch_size frames and keep the best batch_size
+        self.max_attempts = self.batch_size * 4
+        self.attempts = 0
+        self.best_frames = BestFrames(self.batch_size)
         self.is_capture = False
         self.folder = ''
         self.capture_scr = None
@@ -26,6 +66,12 @@ class Gui:
         self.video_stream = None
         self.message = ""
         self.message_color = (0, 255, 0)
+        self.message_until = 0.0
+        self.face_box = None  # last analyzed face (x, y, w, h), shown with the message
+        self.display_fps = 30
+        self.frame_lock = threading.Lock()
+        self.capture_done = False
+        self.writer = ImageWriter()
 
         self.window = Tk()
         self.window.geometry(f"{self.init_width}x{self.init_height}")
@@ -74,9 +120,12 @@ class Gui:
         if self.video_stream and self.video_stream.isOpened():
             self.video_stream.release()  # Release webcam resource
 
+        self.writer.close()  # Finish pending image writes
+
         cv2.destroyAllWindows()  # Close all OpenCV windows
 
     def start(self):
+        self.window.after(0, self._display_tick)
         self.window.mainloop()
 
     def _update_capture_btn(self, *args):
@@ -86,98 +135,120 @@ class Gui:
         return NORMAL if not self.is_capture and self.input_text.get() else DISABLED
 
     def _prepare_video_capture(self):
-        self.video_stream = cv2.VideoCapture(0)
+        self.video_stream = open_capture(0)  # shared frame bus if $FRAME_BUS is published, else the webcam
         if not self.video_stream.isOpened():
             raise Exception("Video stream is not opened!")
         self.stop_event = threading.Event()
         self.capture_thread = threading.Thread(target=self._video_loop, args=())
         self.capture_thread.start()
 
-    def _dat_analyze_image(self, img):
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        std_dev = cv2.meanStdDev(laplacian)[1][0][0]
-        variation = std_dev ** 2
-        brightness = cv2.mean(gray)[0]
-
-        blur_threshold = 100  # Adjust as needed
-        brightness_threshold = (50, 200)  # Acceptable brightness range
-
-        is_blurry = variation < blur_threshold
-        is_bad_lighting = brightness < brightness_threshold[0] or brightness > brightness_threshold[1]
-        return is_blurry, is_bad_lighting
-
     def _overlay_message(self, frame, message, color):
         cv2.putText(frame, message, (50, 350), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
 
-    def _clear_message(self):
-        self.message = ""
+    def _set_message(self, message, color, seconds=2):
+        self.message = message
+        self.message_color = color
+        self.message_until = time.time() + seconds  # Clear message after 2 seconds
+
+    def _overlay_face(self, frame, face_box, full_shape):
+        # The box is in full frame pixels, the preview is resized
+        scale_x = frame.shape[1] / full_shape[1]
+        scale_y = frame.shape[0] / full_shape[0]
+        x, y, w, h = face_box
+        cv2.rectangle(frame, (int(x * scale_x), int(y * scale_y)),
+                      (int((x + w) * scale_x), int((y + h) * scale_y)), self.message_color, 2)
 
-    def _save_images(self):
+    def _save_images(self, frame):
         path = os.path.join(os.getcwd(), f"../train/{self.folder}")
         if not os.path.exists(path):
             os.makedirs(path)
-        is_blurry, is_bad_lighting = self._dat_analyze_image(self.frame)
-
-        if is_blurry:
-            self.message = "Image is blurry. Retake needed!"
-            self.message_color = (0, 0, 255)
-        elif is_bad_lighting:
-            self.message = "Bad lighting detected. Retake needed!"
-            self.message_color = (0, 0, 255)
+        self.attempts += 1
+        metrics = analyze_frame(frame)
+        self.face_box = metrics["face"] if metrics is not None else None
+
+        if metrics is None:
+            self._set_message("No face found. Look at the camera!", (0, 0, 255))
+        elif metrics["is_blurry"]:
+            self._set_message("Image is blurry, frame skipped.", (0, 0, 255))
+        elif metrics["is_bad_lighting"]:
+            self._set_message("Bad lighting, frame skipped.", (0, 0, 255))
         else:
-            self.message = "Image saved successfully!"
-            self.message_color = (0, 255, 0)
-            cv2.imwrite(os.path.join(path, f"{self.capture_idx}.jpg"), self.frame)
-            self.capture_idx += 1
-
-        if is_blurry or is_bad_lighting:
+            # Keep the best batch_size frames; a better frame replaces the worst one kept so far
+            image_path = os.path.join(path, f"{self.capture_idx}.jpg")
+            accepted, evicted = self.best_frames.offer(metrics["score"], image_path)
+            if accepted:
+                self.writer.save(image_path, frame)
+                self.capture_idx += 1
+                if evicted:
+                    self.writer.remove(evicted)
+                self._set_message(f"Image saved (score {metrics['score']:.2f})", (0, 255, 0))
+
+        # Oversample so there is something to choose from, then stop
+        full = len(self.best_frames) >= self.batch_size
+        if (full and self.attempts >= self.batch_size * self.oversample) or self.attempts >= self.max_attempts:
+            print(f"Capture done! Kept {len(self.best_frames)} frames "
+                  f"(worst score {self.best_frames.worst or 0:.2f}) out of {self.attempts}.")
+            self.capture_idx = 0
+            self.attempts = 0
             self.is_capture = False
-            shutil.rmtree(path, ignore_errors=True)
-        else:
-            if self.capture_idx >= self.batch_size:
-                self.capture_idx = 0
-                self.folder = ''
-                self.is_capture = False
-                self._update_capture_btn()
-                self.input_text.set('')
-                print("Capture done!")
-
-        self.window.after(2000, self._clear_message)  # Clear message after 2 seconds
+            self.capture_done = True  # widgets are reset on the Tk thread, in _display_tick
 
     def _video_loop(self):
+        """Capture stage: runs at camera rate and never touches Tk."""
         print('Capturing...')
-        try:
-            while not self.stop_event.is_set():
-                ret, self.frame = self.video_stream.read()
-                if not ret:
-                    self.stop_event.set()
-                    print("Cannot read frame!")
-                    break
-
-                if self.is_capture:
-                    self._save_images()
-
-                if self.message:
-                    self._overlay_message(self.frame, self.message, self.message_color)
-
-                self.frame = imutils.resize(self.frame, height=self.init_height, width=self.init_width)
-                image = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-                image = Image.fromarray(image)
-                image = ImageTk.PhotoImage(image)
-
-                if self.capture_scr is None:
-                    self.capture_scr = Label(image=image)
-                    self.capture_scr.image = image
-                    self.capture_scr.pack(side='top', padx=10, pady=10)
-                else:
-                    self.capture_scr.configure(image=image)
-                    self.capture_scr.image = image
-        except RuntimeError as e:
-            print(f"[INFO] Caught a runtime error {e}")
+        while not self.stop_event.is_set():
+            ret, frame = self.video_stream.read()
+            if not ret:
+                self.stop_event.set()
+                print("Cannot read frame!")
+                break
+
+            with self.frame_lock:
+                self.frame = frame
+
+            if self.is_capture:
+                self._save_images(frame)
+
+    def _display_tick(self):
+        """Display stage: runs on the Tk thread via window.after, throttled to display_fps."""
+        if self.stop_event.is_set():
+            return
+        self.window.after(int(1000 / self.display_fps), self._display_tick)
+
+        if self.capture_done:
+            self.capture_done = False
+            self.folder = ''
+            self._update_capture_btn()
+            self.input_text.set('')
+
+        with self.frame_lock:
+            frame = self.frame
+        if frame is None:
+            return
+
+        full_shape = frame.shape
+        frame = imutils.resize(frame, height=self.init_height, width=self.init_width)  # new array, saved frame stays clean
+        if self.message and time.time() < self.message_until:
+            self._overlay_message(frame, self.message, self.message_color)
+            face_box = self.face_box  # set from the capture thread
+            if face_box is not None:
+                self._overlay_face(frame, face_box, full_shape)
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image = Image.fromarray(image)
+        image = ImageTk.PhotoImage(image)
+
+        if self.capture_scr is None:
+            self.capture_scr = Label(image=image)
+            self.capture_scr.image = image
+            self.capture_scr.pack(side='top', padx=10, pady=10)
+        else:
+            self.capture_scr.configure(image=image)
+            self.capture_scr.image = image
 
     def _start_capture(self):
         print("Start saving images...")
         self.is_capture = True
+        self.attempts = 0
+        self.best_frames = BestFrames(self.batch_size)
         self.folder = self.input_text.get()
         self._update_capture_btn()
\ No newline at end of file
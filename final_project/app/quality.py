@@ -0,0 +1,111 @@
+import heapq
+import os
+
+import cv2
+import numpy as np
+
+ANALYSIS_WIDTH = 320        # face search runs on a frame downsampled to this width
+ROI_SIZE = 128              # every face ROI is scored at this size, whatever the camera resolution
+BLUR_THRESHOLD = 100        # Laplacian variance (on the ROI) below this counts as blurry
+BRIGHTNESS_RANGE = (50, 200)
+CLIP_LOW, CLIP_HIGH = 16, 240
+
+_face_cascade = None
+
+
+def face_cascade():
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'))
+    return _face_cascade
+
+
+def find_face(gray_small):
+    """Largest frontal face in the downsampled gray frame as (x, y, w, h), or None."""
+    faces = face_cascade().detectMultiScale(gray_small, scaleFactor=1.2, minNeighbors=5, minSize=(40, 40))
+    if len(faces) == 0:
+        return None
+    return max(faces, key=lambda f: f[2] * f[3])
+
+
+def score_roi(roi):
+    """Metrics of one ROI_SIZE x ROI_SIZE uint8 gray face crop."""
+    # Sharpness: Laplacian variance in int16 instead of float64
+    lap = cv2.Laplacian(roi, cv2.CV_16S)
+    sharpness = float(cv2.meanStdDev(lap)[1][0][0]) ** 2
+
+    # Exposure: histogram of the face only, so a bright window behind the person doesn't count
+    hist = cv2.calcHist([roi], [0], None, [256], [0, 256]).ravel() / roi.size
+    brightness = float(np.dot(hist, np.arange(256)))
+    clipped = float(hist[:CLIP_LOW].sum() + hist[CLIP_HIGH:].sum())
+
+    # Pose: a frontal face is close to left/right symmetric
+    half = ROI_SIZE // 2
+    left = roi[:, :half].astype(np.int16)
+    right = roi[:, :ROI_SIZE - half - 1:-1].astype(np.int16)
+    asymmetry = float(np.abs(left - right).mean()) / 255.0
+
+    sharp_score = min(sharpness / (2 * BLUR_THRESHOLD), 1.0)
+    low, high = BRIGHTNESS_RANGE
+    mid, span = (low + high) / 2, (high - low) / 2
+    exposure_score = max(0.0, 1.0 - abs(brightness - mid) / (2 * span)) * (1.0 - clipped)
+    pose_score = max(0.0, 1.0 - 4 * asymmetry)
+
+    return {
+        "sharpness": sharpness,
+        "brightness": brightness,
+        "clipped": clipped,
+        "asymmetry": asymmetry,
+        "is_blurry": sharpness < BLUR_THRESHOLD,
+        "is_bad_lighting": brightness < low or brightness > high,
+        "score": sharp_score * 0.5 + exposure_score * 0.3 + pose_score * 0.2,
+    }
+
+
+def analyze_frame(frame):
+    """Find the face on a downsampled copy of the frame and score only that region.
+    Returns the metrics dict (with "face": x, y, w, h in frame pixels) or None if no face."""
+    scale = ANALYSIS_WIDTH / frame.shape[1]
+    small = cv2.resize(frame, (ANALYSIS_WIDTH, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    face = find_face(gray)
+    if face is None:
+        return None
+    x, y, w, h = face
+    roi = cv2.resize(gray[y:y + h, x:x + w], (ROI_SIZE, ROI_SIZE), interpolation=cv2.INTER_AREA)
+    metrics = score_roi(roi)
+    metrics["face"] = tuple(int(v / scale) for v in face)
+    return metrics
+
+
+class BestFrames:
+    """Keeps the `capacity` best-scoring captures seen so far (min-heap on score).
+
+    offer() returns (accepted, evicted): evicted is the item pushed out to make room,
+    so the caller can delete its file."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._heap = []
+        self._count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def offer(self, score, item):
+        self._count += 1
+        entry = (score, self._count, item)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+            return True, None
+        if score <= self._heap[0][0]:
+            return False, None
+        evicted = heapq.heapreplace(self._heap, entry)
+        return True, evicted[2]
+
+    @property
+    def worst(self):
+        return self._heap[0][0] if self._heap else None
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
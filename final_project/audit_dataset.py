@@ -0,0 +1,108 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+from app.blur_test import image_metrics
+from label_stats import LabelTable
+
+FIELDS = ['path', 'person', 'width', 'height', 'std_deviation', 'variation', 'blur', 'mean_brightness',
+          'lighting', 'boxes', 'face_width', 'face_height', 'face_area_ratio', 'error']
+
+
+def init_worker():
+    cv2.setNumThreads(1)  # one image per process; OpenCV's own threads would only oversubscribe the CPU
+
+
+def audit_one(job):
+    """Decode + metrics for one image; runs in a worker process."""
+    path, person, boxes, (box_w, box_h) = job   # normalized size of the largest label box
+    row = dict.fromkeys(FIELDS)  # None for missing values: Parquet columns can't mix numbers and ''
+    row.update(path=path, person=person, boxes=boxes)
+    img = cv2.imread(path)
+    if img is None:
+        row['error'] = 'unreadable'
+        return row
+    height, width = img.shape[:2]
+    row.update(width=width, height=height, **image_metrics(img))
+    face_w, face_h = round(float(box_w) * width), round(float(box_h) * height)
+    row.update(face_width=face_w, face_height=face_h, face_area_ratio=round(face_w * face_h / (width * height), 4))
+    return row
+
+
+def write_report(rows, output):
+    if output.endswith('.parquet'):
+        import pandas as pd  # only needed for Parquet output
+        pd.DataFrame(rows, columns=FIELDS).to_parquet(output, index=False)
+        return
+    with open(output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def keep(row, args):
+    if row['error']:
+        return False
+    if row['blur'] == 'Blurry' or row['lighting'] != 'Good Lighting':
+        return False
+    return not args.min_face or (row['face_width'] or 0) >= args.min_face
+
+
+def main(args):
+    # Label boxes come from label_stats' cached table instead of being re-parsed in every worker
+    table = LabelTable(args.root, args.label_root)
+    largest = table.largest_boxes()
+    counts = np.diff(table.offsets)
+    row_of = {label_path: i for i, (_, label_path, _) in enumerate(table.files)}
+    jobs = []
+    for e in table.index.entries(labeled=True if args.labeled_only else None):
+        row = row_of.get(e.label_path)
+        jobs.append((e.path, e.person, int(counts[row]) if row is not None else 0,
+                     tuple(largest[row]) if row is not None else (0.0, 0.0)))
+    print(f"Auditing {len(jobs)} images with {args.workers} processes...")
+
+    rows = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker) as pool:
+        # Each worker decodes its own images, so decoding scales with the number of workers
+        for i, row in enumerate(pool.imap_unordered(audit_one, jobs, chunksize=16), 1):
+            rows.append(row)
+            if i % 1000 == 0:
+                print(f"[{i}/{len(jobs)}] {i / (time.perf_counter() - start):.1f} images/sec")
+
+    rows.sort(key=lambda row: row['path'])
+    write_report(rows, args.output)
+
+    elapsed = time.perf_counter() - start
+    blurry = sum(row['blur'] == 'Blurry' for row in rows)
+    bad_light = sum(row['lighting'] not in (None, 'Good Lighting') for row in rows)
+    errors = sum(bool(row['error']) for row in rows)
+    print(f"\n{len(rows)} images in {elapsed:.1f}s: {blurry} blurry, {bad_light} badly lit, {errors} unreadable.")
+    print(f"Report: {args.output}")
+
+    if args.manifest:
+        kept = [row['path'] for row in rows if keep(row, args)]
+        with open(args.manifest, 'w') as f:
+            f.writelines(path + '\n' for path in kept)
+        print(f"Filtered manifest ({len(kept)} images): {args.manifest}")
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Blur / lighting / resolution / face-size audit of a whole dataset.')
+    parser.add_argument('root', type=str, help='Dataset root with one folder per person.')
+    parser.add_argument('--label_root', type=str, default=None, help='Separate label tree (root/<person> layout).')
+    parser.add_argument('--labeled_only', action='store_true', help='Only audit images that have a label.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes.')
+    parser.add_argument('--output', type=str, default='audit_report.csv', help='.csv or .parquet (needs pandas).')
+    parser.add_argument('--manifest', type=str, default='', help='Write the paths that pass the audit, one per line.')
+    parser.add_argument('--min_face', type=int, default=0, help='Also drop images whose largest face box is narrower (px).')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
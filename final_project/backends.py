@@ -0,0 +1,101 @@
+import importlib.util
+import os
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inference.yaml')
+DEFAULTS = {
+    'runtime': 'auto',
+    'device': 'auto',
+    'face_weights': 'runs/detect/yolo11_face_final/weights/best.pt',
+    'person_weights': 'yolo11n.pt',
+    'cascade': True,
+    'detect_every': 3,
+    'recognition': 'classes',
+    'gallery': '../smart-home-backend/faces_db',
+    'match_threshold': None,
+}
+RUNTIMES = ('torch', 'onnx', 'openvino')
+CPU_PREFERENCE = ('openvino', 'onnx', 'torch')
+RUNTIME_PACKAGES = {'torch': 'torch', 'onnx': 'onnxruntime', 'openvino': 'openvino'}
+
+
+def load_config(path=CONFIG_PATH):
+    """inference.yaml merged over DEFAULTS; $YOLO_RUNTIME / $YOLO_DEVICE override the file."""
+    config = dict(DEFAULTS)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            config.update(yaml.safe_load(f) or {})
+    config['runtime'] = os.environ.get('YOLO_RUNTIME', config['runtime'])
+    config['device'] = os.environ.get('YOLO_DEVICE', config['device'])
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for key in ('face_weights', 'person_weights', 'gallery'):
+        if not os.path.isabs(config[key]):
+            config[key] = os.path.join(base_dir, config[key])
+    return config
+
+
+def cuda_available():
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def resolve_device(device='auto'):
+    if device == 'auto':
+        return 'cuda' if cuda_available() else 'cpu'
+    if str(device).startswith('cuda') and not cuda_available():
+        print(f"CUDA not available, using CPU instead of {device}.")
+        return 'cpu'
+    return device
+
+
+def runtime_available(runtime):
+    return importlib.util.find_spec(RUNTIME_PACKAGES[runtime]) is not None
+
+
+def resolve_runtime(runtime, device):
+    if runtime == 'auto':
+        if str(device).startswith('cuda'):
+            return 'torch'
+        return next((r for r in CPU_PREFERENCE if runtime_available(r)), 'torch')
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown runtime '{runtime}', expected one of {RUNTIMES}")
+    if not runtime_available(runtime):
+        print(f"{RUNTIME_PACKAGES[runtime]} is not installed, using PyTorch instead of {runtime}.")
+        return 'torch'
+    return runtime
+
+
+def exported_path(weights, runtime):
+    stem = os.path.splitext(weights)[0]
+    return {'torch': weights, 'onnx': stem + '.onnx', 'openvino': stem + '_openvino_model'}[runtime]
+
+
+def load_model(weights, runtime='auto', device='auto'):
+    """YOLO model for the requested runtime, exporting the .pt once if needed.
+
+    Returns (model, runtime, device). Exported models go through the same
+    ultralytics predict() API, so callers and box outputs stay the same.
+    """
+    from ultralytics import YOLO
+
+    device = resolve_device(device)
+    runtime = resolve_runtime(runtime, device)
+    path = exported_path(weights, runtime)
+    if runtime != 'torch' and not os.path.exists(path):
+        print(f"Exporting {weights} to {runtime}...")
+        # dynamic input size: the cascade runs at 320px, the full-frame path at frame size
+        path = YOLO(weights).export(format=runtime, dynamic=True)
+    return YOLO(path, task='detect'), runtime, device
+
+
+def load_models(config=None):
+    """(face_model, human_model, device) as configured in inference.yaml."""
+    config = config or load_config()
+    face_model, runtime, device = load_model(config['face_weights'], config['runtime'], config['device'])
+    human_model, _, _ = load_model(config['person_weights'], runtime, device)
+    print(f"Detection runtime: {runtime} on {device}")
+    return face_model, human_model, device
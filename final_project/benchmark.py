@@ -0,0 +1,201 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from backends import load_config, load_models
+from detection import detect
+from tracker import Tracker, draw_tracks
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+STAGES = ('decode', 'preprocess', 'face_predict', 'human_predict', 'postprocess', 'track', 'render')
+
+
+def resize_to_width(frame, width):
+    if not width or frame.shape[1] <= width:
+        return frame
+    height = round(frame.shape[0] * width / frame.shape[1])
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def iter_frames(source, limit=None, resize=0):
+    """Yield (decode_ms, frame) from a video file or an image folder, in a fixed order.
+    With resize, frames are downscaled to that width (counted as decode time)."""
+    count = 0
+    if os.path.isdir(source):
+        for name in sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS)):
+            if limit and count >= limit:
+                return
+            start = time.perf_counter()
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                frame = resize_to_width(frame, resize)
+            decode_ms = (time.perf_counter() - start) * 1000
+            if frame is not None:
+                count += 1
+                yield decode_ms, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    while not limit or count < limit:
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        if ret:
+            frame = resize_to_width(frame, resize)
+        decode_ms = (time.perf_counter() - start) * 1000
+        if not ret:
+            break
+        count += 1
+        yield decode_ms, frame
+    cap.release()
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {}
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def run_source(source, face_model, human_model, device, config, args, imgsz=None):
+    tracker = Tracker(face_model.names)
+    records = []
+    detector_calls = 0
+    wall_start = time.perf_counter()
+
+    for idx, (decode_ms, frame) in enumerate(iter_frames(source, args.frames, args.resize)):
+        frame_start = time.perf_counter()
+        timings = {stage: 0.0 for stage in STAGES}
+        timings['decode'] = decode_ms
+
+        if idx % config['detect_every'] == 0:
+            faces, persons = detect(face_model, human_model, frame, device, cascade=config['cascade'],
+                                    imgsz=imgsz, timings=timings)
+            start = time.perf_counter()
+            tracks, _ = tracker.update(faces)
+            detector_calls += 1
+        else:
+            start = time.perf_counter()
+            tracks = tracker.predict()
+        timings['track'] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        draw_tracks(frame, tracks)
+        timings['render'] = (time.perf_counter() - start) * 1000
+
+        timings['latency'] = decode_ms + (time.perf_counter() - frame_start) * 1000
+        timings['faces'] = len(tracks)
+        records.append(timings)
+
+    wall = time.perf_counter() - wall_start
+    result = {
+        "source": source,
+        "imgsz": imgsz,
+        "resize": args.resize or None,
+        "frames": len(records),
+        "detector_calls": detector_calls,
+        "fps": round(len(records) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": summarize([r['latency'] for r in records]),
+        "stages_ms": {stage: summarize([r[stage] for r in records]) for stage in STAGES},
+    }
+    return result, records
+
+
+def print_result(result):
+    lat = result["latency_ms"]
+    size = f" @ imgsz {result['imgsz']}" if result["imgsz"] else ""
+    print(f"{result['source']}{size}: {result['frames']} frames, {result['fps']} FPS, "
+          f"latency p50 {lat.get('p50')} / p95 {lat.get('p95')} / p99 {lat.get('p99')} ms, "
+          f"{result['detector_calls']} detector calls")
+    for stage, stats in result["stages_ms"].items():
+        print(f"    {stage:>13}: mean {stats.get('mean', 0):8.2f}  p95 {stats.get('p95', 0):8.2f} ms")
+
+
+def main(args):
+    config = load_config()
+    if args.runtime:
+        config['runtime'] = args.runtime
+    if args.device:
+        config['device'] = args.device
+    if args.cascade is not None:
+        config['cascade'] = args.cascade
+    if args.detect_every:
+        config['detect_every'] = args.detect_every
+    if args.threads:
+        cv2.setNumThreads(args.threads)
+        try:
+            import torch
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    face_model, human_model, device = load_models(config)
+    sizes = args.imgsz or [None]  # None: the detection path's own sizes
+
+    # Warm up on the first frame so model loading / lazy init is not measured
+    first = next(iter_frames(args.sources[0], 1, args.resize), None)
+    if first is not None:
+        for imgsz in sizes:
+            for _ in range(args.warmup):
+                detect(face_model, human_model, first[1], device, cascade=config['cascade'], imgsz=imgsz)
+
+    report = {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {k: config[k] for k in ('runtime', 'device', 'cascade', 'detect_every')},
+        "resolved_device": device,
+        "runs": [],
+    }
+    all_records = []
+    for source in args.sources:
+        for imgsz in sizes:
+            result, records = run_source(source, face_model, human_model, device, config, args, imgsz)
+            report["runs"].append(result)
+            all_records.extend(dict(r, source=source, imgsz=imgsz or '', frame=i) for i, r in enumerate(records))
+            print_result(result)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.csv and all_records:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['source', 'imgsz', 'frame', *STAGES, 'latency', 'faces'])
+            writer.writeheader()
+            writer.writerows(all_records)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Headless replay benchmark for the infer23.py detection path.')
+    parser.add_argument('sources', nargs='+', help='Video files or image folders.')
+    parser.add_argument('--runtime', choices=('auto', 'torch', 'onnx', 'openvino'), help='Override inference.yaml.')
+    parser.add_argument('--device', type=str, help='Override inference.yaml (e.g. cpu, cuda).')
+    parser.add_argument('--cascade', dest='cascade', action='store_true', default=None)
+    parser.add_argument('--no-cascade', dest='cascade', action='store_false')
+    parser.add_argument('--detect-every', type=int, default=0, help='Override inference.yaml detect_every.')
+    parser.add_argument('--imgsz', type=int, nargs='+', default=None,
+                        help='Model input size(s); several values are benchmarked one after another.')
+    parser.add_argument('--resize', type=int, default=0, help='Downscale frames to this width before detection.')
+    parser.add_argument('--frames', type=int, default=0, help='Max frames per source (0 = all).')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=0, help='Pin OpenCV/PyTorch thread count for repeatable runs.')
+    parser.add_argument('--output', type=str, default='bench_results/benchmark.json')
+    parser.add_argument('--csv', type=str, default='', help='Optional per-frame CSV.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
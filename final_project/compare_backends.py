@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backends import RUNTIMES, load_config, load_model, runtime_available
+from detection import boxes_of, iou_matrix
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def load_frames(source, limit):
+    if os.path.isdir(source):
+        names = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+        return [cv2.imread(os.path.join(source, name)) for name in names[:limit]]
+    frames = []
+    cap = cv2.VideoCapture(source)
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(model, frames, device, imgsz, warmup):
+    for frame in frames[:warmup]:
+        model.predict(source=frame, imgsz=imgsz, device=device, verbose=False)
+    latencies, outputs = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        result = model.predict(source=frame, imgsz=imgsz, device=device, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(boxes_of(result))
+    return np.array(latencies), outputs
+
+
+def agreement(reference, outputs):
+    """Mean best-IoU of reference boxes against the same-class boxes of another runtime, plus count mismatches."""
+    ious, count_mismatch = [], 0
+    for ref, out in zip(reference, outputs):
+        if len(ref) != len(out):
+            count_mismatch += 1
+        if len(ref) == 0:
+            continue
+        if len(out) == 0:
+            ious.extend([0.0] * len(ref))
+            continue
+        overlaps = iou_matrix(ref, out) * (ref[:, None, 5] == out[None, :, 5])
+        ious.extend(overlaps.max(axis=1).tolist())
+    return (float(np.mean(ious)) if ious else 1.0), count_mismatch
+
+
+def main(args):
+    config = load_config()
+    weights = config[args.model + '_weights']
+    frames = [f for f in load_frames(args.source, args.frames) if f is not None]
+    if not frames:
+        print(f"No frames read from {args.source}")
+        return
+
+    report, reference = [], None
+    for runtime in args.runtimes:
+        if not runtime_available(runtime):
+            print(f"[{runtime}] not installed, skipped")
+            continue
+        model, runtime, device = load_model(weights, runtime, args.device)
+        latencies, outputs = run(model, frames, device, args.imgsz, args.warmup)
+        if reference is None:
+            reference = outputs
+        mean_iou, mismatches = agreement(reference, outputs)
+        row = {
+            "runtime": runtime,
+            "device": device,
+            "frames": len(frames),
+            "mean_ms": round(float(latencies.mean()), 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "fps": round(1000.0 / float(latencies.mean()), 1),
+            "box_iou_vs_first": round(mean_iou, 4),
+            "box_count_mismatches": mismatches,
+        }
+        report.append(row)
+        print(f"[{runtime:>8}] {row['mean_ms']:8.2f} ms mean  {row['p95_ms']:8.2f} ms p95  "
+              f"{row['fps']:6.1f} FPS  IoU {row['box_iou_vs_first']:.3f}  mismatches {mismatches}")
+
+    if report:
+        fastest = min(report, key=lambda r: r['mean_ms'])
+        print(f"\nFastest on this host: {fastest['runtime']} ({fastest['mean_ms']} ms)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Compare YOLO runtimes (latency and box agreement) on this host.')
+    parser.add_argument('--source', type=str, required=True, help='Folder of images or a video file.')
+    parser.add_argument('--model', choices=('face', 'person'), default='face')
+    parser.add_argument('--runtimes', nargs='+', choices=RUNTIMES, default=list(RUNTIMES))
+    parser.add_argument('--device', type=str, default='cpu')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', type=str, default='', help='Optional JSON report path.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
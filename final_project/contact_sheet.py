@@ -0,0 +1,130 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+from label_stats import LabelTable
+
+THUMB = 192             # thumbnail cell size (px)
+COLS, ROWS = 8, 6       # cells per page
+NO_BOXES = np.empty((0, 5), dtype=np.float32)
+
+
+def thumbnail(image_path, boxes, names, caption):
+    """One THUMB x THUMB cell: letterboxed image with its boxes drawn in pixel space."""
+    cell = np.full((THUMB, THUMB, 3), 32, dtype=np.uint8)
+    img = cv2.imread(image_path, cv2.IMREAD_REDUCED_COLOR_2)  # decoder halves the size, plenty for a thumbnail
+    if img is None:
+        cv2.putText(cell, 'unreadable', (10, THUMB // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        return cell
+    h, w = img.shape[:2]
+    scale = THUMB / max(h, w)
+    tw, th = max(int(w * scale), 1), max(int(h * scale), 1)
+    ox, oy = (THUMB - tw) // 2, (THUMB - th) // 2
+    cell[oy:oy + th, ox:ox + tw] = cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA)
+
+    for class_id, x, y, bw, bh in boxes:
+        x1, y1 = int(ox + (x - bw / 2) * tw), int(oy + (y - bh / 2) * th)
+        x2, y2 = int(ox + (x + bw / 2) * tw), int(oy + (y + bh / 2) * th)
+        cv2.rectangle(cell, (x1, y1), (x2, y2), (255, 0, 0), 2)
+        label = names[int(class_id)] if int(class_id) < len(names) else f"Class {int(class_id)}"
+        cv2.putText(cell, label, (x1, max(y1 - 4, 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
+    cv2.putText(cell, caption[:30], (4, THUMB - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255, 255, 255), 1)
+    return cell
+
+
+def render_page(job):
+    """Worker: tile one page of cells and write it as a JPEG."""
+    output_path, items, names = job
+    cv2.setNumThreads(1)
+    sheet = np.zeros((ROWS * THUMB, COLS * THUMB, 3), dtype=np.uint8)
+    for i, (image_path, boxes, caption) in enumerate(items):
+        r, c = divmod(i, COLS)
+        sheet[r * THUMB:(r + 1) * THUMB, c * THUMB:(c + 1) * THUMB] = thumbnail(image_path, boxes, names, caption)
+    cv2.imwrite(output_path, sheet, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return output_path
+
+
+def load_names(yaml_path):
+    if not yaml_path or not os.path.exists(yaml_path):
+        return []
+    import yaml
+    with open(yaml_path, 'r') as f:
+        return list(yaml.safe_load(f).get('names', []))
+
+
+def read_list(list_path):
+    with open(list_path, 'r') as f:
+        return {os.path.abspath(line.strip()) for line in f if line.strip()}
+
+
+def main(args):
+    # Boxes and flags come from label_stats, so "suspicious" here means exactly what its rules say
+    table = LabelTable(args.root, args.label_root)
+    index = table.index
+    names = load_names(args.names)
+    reasons = table.file_reasons(names)
+    row_of = {label_path: i for i, (_, label_path, _) in enumerate(table.files)}
+    entries = index.entries(labeled=None if args.include_unlabeled else True)
+
+    # Groups: one per person, or one per list file (e.g. split_face/train.txt, validation.txt)
+    if args.lists:
+        groups = {}
+        for list_path in args.lists:
+            wanted = read_list(list_path)
+            groups[os.path.splitext(os.path.basename(list_path))[0]] = [e for e in entries if e.path in wanted]
+    else:
+        groups = {person: [e for e in entries if e.person == person] for person in index.persons()}
+
+    jobs = []
+    flagged = 0
+    per_page = COLS * ROWS
+    for group, members in groups.items():
+        items = []
+        for entry in members:
+            row = row_of.get(entry.label_path)
+            boxes = table.file_boxes(row) if row is not None else NO_BOXES
+            flags = reasons[row] if row is not None else ['unlabeled']
+            if args.suspicious_only and not flags:
+                continue
+            flagged += bool(flags)
+            caption = (f"{', '.join(flags)} | " if flags else '') + os.path.basename(entry.path)
+            items.append((entry.path, boxes, caption))
+        if not items:
+            continue
+        group_dir = os.path.join(args.output_dir, group)
+        os.makedirs(group_dir, exist_ok=True)
+        pages = math.ceil(len(items) / per_page)
+        for page in range(pages):
+            jobs.append((os.path.join(group_dir, f"page_{page + 1:03d}.jpg"),
+                         items[page * per_page:(page + 1) * per_page], names))
+        print(f"[{group}] {len(items)} images -> {pages} pages")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for done, _ in enumerate(pool.imap_unordered(render_page, jobs), 1):
+            if done % 20 == 0:
+                print(f"  {done}/{len(jobs)} pages")
+    print(f"\nRendered {len(jobs)} pages ({flagged} suspicious labels) in {time.perf_counter() - start:.1f}s "
+          f"to {args.output_dir}")
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Render YOLO labels as paginated contact sheets for review.')
+    parser.add_argument('root', type=str, help='Dataset root with one folder per person.')
+    parser.add_argument('--label_root', type=str, default=None, help='Separate label tree (root/<person> layout).')
+    parser.add_argument('--lists', nargs='*', default=None, help='Group by these list files (one sheet set per split).')
+    parser.add_argument('--suspicious_only', action='store_true', help='Only images failing a label_stats rule.')
+    parser.add_argument('--include_unlabeled', action='store_true', help='Also show images without a label file.')
+    parser.add_argument('--names', type=str, default='face_data.yaml', help='YAML with class names.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Rendering processes.')
+    parser.add_argument('--output_dir', type=str, default='contact_sheets')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
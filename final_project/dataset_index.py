@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+INDEX_NAME = '.dataset_index.json'   # .dataset_index.<label root hash>.json with a separate label tree
+INDEX_VERSION = 1
+
+# One image of the dataset. Paths are absolute; label_path is None for unlabeled images.
+Entry = namedtuple('Entry', 'path label_path person size mtime sha1 boxes label_mtime')
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_boxes(label_path):
+    with open(label_path, 'r') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DatasetIndex:
+    """Persistent manifest of a person-per-folder dataset.
+
+    Both layouts used by the dataset tools are understood:
+      root/<person>/images/*.jpg + root/<person>/labels/*.txt   (dataset_face, split_face/<split>)
+      root/<person>/*.jpg + label_root/<person>/*.txt           (Train + labels from align _face.py)
+
+    The manifest is kept in root/.dataset_index.json, or in a file named after the
+    label root when labels live elsewhere, so tools reading the same images with
+    different label trees don't invalidate each other's hashes. refresh() only re-lists the
+    folders of persons whose directory mtimes changed, only re-hashes files whose
+    size or mtime changed, and refresh(full=True) re-stats every file (needed to
+    notice a label file edited in place, which does not touch its folder's mtime).
+    """
+
+    def __init__(self, root, label_root=None, index_path=None, extensions=IMAGE_EXTENSIONS):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.label_root = os.path.abspath(os.path.expanduser(label_root)) if label_root else None
+        self.index_path = index_path or os.path.join(self.root, self.index_name(self.label_root))
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.dirs = {}
+        self.person_names = []
+        self.records = {}
+        self._groups = None
+        self._load()
+
+    @staticmethod
+    def index_name(label_root):
+        if not label_root:
+            return INDEX_NAME
+        digest = hashlib.sha1(label_root.encode('utf-8')).hexdigest()[:10]
+        return INDEX_NAME.replace('.json', f'.{digest}.json')
+
+    # --- persistence ---
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            return
+        if data.get('version') != INDEX_VERSION or data.get('label_root') != self.label_root:
+            return
+        self.dirs = data['dirs']
+        self.person_names = data['persons']
+        self.records = data['entries']
+
+    def save(self):
+        data = {"version": INDEX_VERSION, "label_root": self.label_root, "dirs": self.dirs,
+                "persons": self.person_names, "entries": self.records}
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    # --- layout ---
+    def image_dir(self, person):
+        nested = os.path.join(self.root, person, 'images')
+        return nested if os.path.isdir(nested) else os.path.join(self.root, person)
+
+    def label_dir(self, person):
+        if self.label_root:
+            return os.path.join(self.label_root, person)
+        nested = os.path.join(self.root, person, 'labels')
+        return nested if os.path.isdir(nested) else os.path.join(self.root, person)
+
+    def _person_dirs(self, person):
+        return {os.path.join(self.root, person), self.image_dir(person), self.label_dir(person)}
+
+    # --- refresh ---
+    def refresh(self, full=False, workers=8):
+        """Bring the manifest up to date with the filesystem and save it if anything changed."""
+        # The root is re-listed every time: it holds the manifest itself, so its mtime
+        # moves on every save, and listing a handful of person folders is cheap.
+        changed = False
+        persons = sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+        if persons != self.person_names:
+            for rel in [rel for rel, rec in self.records.items() if rec['person'] not in persons]:
+                del self.records[rel]
+            self.person_names = persons
+            changed = True
+
+        to_hash = []
+        for person in self.person_names:
+            dirs = self._person_dirs(person)
+            if not full and all(path in self.dirs and self.dirs[path] == dir_mtime(path) for path in dirs):
+                continue
+            to_hash.extend(self._scan_person(person))
+            for path in dirs:
+                self.dirs[path] = dir_mtime(path)
+            changed = True
+
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                digests = pool.map(file_sha1, (os.path.join(self.root, rel) for rel in to_hash))
+                for rel, digest in zip(to_hash, digests):
+                    self.records[rel]['sha1'] = digest
+
+        if changed:
+            self._groups = None
+            self.save()
+        return self
+
+    def _scan_person(self, person):
+        """Re-list one person's folders; returns relative paths of images that need hashing."""
+        image_dir, label_dir = self.image_dir(person), self.label_dir(person)
+        labels = {}
+        if os.path.isdir(label_dir):
+            for entry in os.scandir(label_dir):
+                if entry.name.lower().endswith('.txt') and entry.is_file():
+                    labels[os.path.splitext(entry.name)[0]] = entry
+
+        seen = set()
+        to_hash = []
+        for entry in os.scandir(image_dir) if os.path.isdir(image_dir) else ():
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() not in self.extensions or not entry.is_file():
+                continue
+            rel = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+            seen.add(rel)
+            stat = entry.stat()
+            record = self.records.get(rel)
+            if record is None or record['size'] != stat.st_size or record['mtime'] != stat.st_mtime_ns:
+                record = {"person": person, "size": stat.st_size, "mtime": stat.st_mtime_ns, "sha1": None,
+                          "label": None, "label_mtime": None, "boxes": 0}
+                self.records[rel] = record
+                to_hash.append(rel)
+
+            label = labels.get(stem)
+            if label is None:
+                record.update(label=None, label_mtime=None, boxes=0)
+                continue
+            label_mtime = label.stat().st_mtime_ns
+            if record['label'] != label.name or record['label_mtime'] != label_mtime:
+                record.update(label=label.name, label_mtime=label_mtime, boxes=count_boxes(label.path))
+
+        for rel in [rel for rel, rec in self.records.items() if rec['person'] == person and rel not in seen]:
+            del self.records[rel]
+        return to_hash
+
+    # --- queries ---
+    def persons(self):
+        return list(self.person_names)
+
+    def _grouped(self):
+        """(all relative paths sorted, person -> its sorted paths), built once per refresh."""
+        if self._groups is None:
+            ordered = sorted(self.records)
+            by_person = {}
+            for rel in ordered:
+                by_person.setdefault(self.records[rel]['person'], []).append(rel)
+            self._groups = (ordered, by_person)
+        return self._groups
+
+    def entries(self, person=None, labeled=None):
+        """Entries sorted by path, optionally for one person and/or only (un)labeled images."""
+        found = []
+        label_dirs = {}
+        ordered, by_person = self._grouped()
+        for rel in ordered if person is None else by_person.get(person, ()):
+            record = self.records[rel]
+            if labeled is not None and (record['label'] is not None) != labeled:
+                continue
+            label_path = None
+            if record['label']:
+                if record['person'] not in label_dirs:
+                    label_dirs[record['person']] = self.label_dir(record['person'])
+                label_path = os.path.join(label_dirs[record['person']], record['label'])
+            found.append(Entry(os.path.join(self.root, *rel.split('/')), label_path, record['person'],
+                               record['size'], record['mtime'], record['sha1'], record['boxes'], record['label_mtime']))
+        return found
+
+
+def load_index(root, label_root=None, full=False):
+    """Open (or build) the manifest for root and bring it up to date."""
+    return DatasetIndex(root, label_root).refresh(full=full)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Build or update the dataset manifest and print a summary.')
+    parser.add_argument('root', type=str, help='Dataset root with one folder per person.')
+    parser.add_argument('--label_root', type=str, default=None, help='Separate label tree (root/<person> layout).')
+    parser.add_argument('--full', action='store_true', help='Re-stat every file, not only changed folders.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_arguments()
+    index = load_index(args.root, args.label_root, full=args.full)
+    for person in index.persons():
+        entries = index.entries(person)
+        labeled = [e for e in entries if e.label_path]
+        print(f"{person}: {len(entries)} images, {len(labeled)} labeled, {sum(e.boxes for e in labeled)} boxes")
+    print(f"Manifest: {index.index_path}")
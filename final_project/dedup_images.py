@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from dataset_index import load_index
+
+HASH_CACHE = '.phash_cache.npz'
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dhash(image_path):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail."""
+    img = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)  # decoder downsamples, much cheaper for JPEGs
+    if img is None:
+        return None
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).view('>u8')[0].astype(np.uint64)
+
+
+def hamming(hashes, value):
+    """Hamming distance between one 64-bit hash and an array of them."""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def load_hash_cache(path):
+    if not os.path.exists(path):
+        return {}
+    data = np.load(path)
+    return dict(zip(data['sha1'].tolist(), data['hash'].tolist()))
+
+
+def save_hash_cache(path, cache):
+    np.savez(path, sha1=np.array(list(cache.keys())), hash=np.array(list(cache.values()), dtype=np.uint64))
+
+
+def compute_hashes(entries, cache, workers=8):
+    """Hashes for all entries; images already in the cache (by content sha1) are not decoded again."""
+    missing = [entry for entry in entries if entry.sha1 not in cache]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for entry, value in zip(missing, pool.map(dhash, (entry.path for entry in missing))):
+            if value is not None:
+                cache[entry.sha1] = int(value)
+    return len(missing)
+
+
+def cluster(entries, cache, threshold):
+    """Leader clustering: an image joins the first representative within threshold bits,
+    otherwise it becomes a representative. Each image is compared (vectorized) only against
+    the representatives kept so far, which stay few when the data is mostly near-duplicates.
+
+    Larger files go first, so the representative is the most detailed frame of its cluster."""
+    order = sorted((entry for entry in entries if entry.sha1 in cache), key=lambda entry: (-entry.size, entry.path))
+    reps = np.empty(len(order), dtype=np.uint64)
+    members = []
+    for entry in order:
+        value = cache[entry.sha1]
+        count = len(members)
+        if count:
+            distances = hamming(reps[:count], value)
+            best = int(np.argmin(distances))
+            if distances[best] <= threshold:
+                members[best].append(entry)
+                continue
+        reps[count] = value
+        members.append([entry])
+    return members
+
+
+def main(args):
+    start = time.perf_counter()
+    index = load_index(args.root, args.label_root)
+    cache_path = os.path.join(index.root, HASH_CACHE)
+    cache = load_hash_cache(cache_path)
+
+    kept, clusters = [], []
+    total = 0
+    for person in index.persons():
+        entries = index.entries(person, labeled=True if args.labeled_only else None)
+        total += len(entries)
+        hashed = compute_hashes(entries, cache, args.workers)
+        groups = cluster(entries, cache, args.threshold)
+        kept.extend(group[0] for group in groups)
+        clusters.extend({"keep": group[0].path, "duplicates": [entry.path for entry in group[1:]]}
+                        for group in groups if len(group) > 1)
+        print(f"[{person}] {len(entries)} images ({hashed} hashed) -> {len(groups)} kept")
+
+    save_hash_cache(cache_path, cache)
+
+    # Same format as the split list files: one image path per line
+    kept.sort(key=lambda entry: entry.path)
+    with open(args.output, 'w') as f:
+        f.writelines(entry.path + '\n' for entry in kept)
+    if args.clusters:
+        with open(args.clusters, 'w', encoding='utf-8') as f:
+            json.dump(clusters, f, indent=1)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nKept {len(kept)} of {total} images ({total - len(kept)} near-duplicates) in {elapsed:.1f}s.")
+    print(f"Pruned manifest: {args.output}")
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Find near-duplicate images per person and write a pruned manifest.')
+    parser.add_argument('root', type=str, help='Dataset root with one folder per person.')
+    parser.add_argument('--label_root', type=str, default=None, help='Separate label tree (root/<person> layout).')
+    parser.add_argument('--threshold', type=int, default=6, help='Max differing bits (of 64) to count as a duplicate.')
+    parser.add_argument('--labeled_only', action='store_true', help='Only consider images that have a label.')
+    parser.add_argument('--workers', type=int, default=8, help='Decode threads.')
+    parser.add_argument('--output', type=str, default='pruned_manifest.txt', help='Kept image paths, one per line.')
+    parser.add_argument('--clusters', type=str, default='', help='Optional JSON of each kept image and its duplicates.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
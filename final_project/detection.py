@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+
+# --- Detection settings (same thresholds infer23.py has always used) ---
+FACE_CONF = 0.46
+FACE_IOU = 0.72
+PERSON_CONF = 0.4
+PERSON_IMGSZ = 320      # cascade: cheap person pass at reduced resolution
+FACE_CROP_IMGSZ = 320   # cascade: face pass on person crops
+CROP_MARGIN = 0.1       # grow person boxes a little so heads are never cut off
+
+EMPTY = np.empty((0, 6), dtype=np.float32)
+
+
+def add_time(timings, key, ms):
+    if timings is not None:
+        timings[key] = timings.get(key, 0.0) + ms
+
+
+def add_speed(timings, results, predict_key):
+    """Split ultralytics' per-image speed into preprocess / <predict_key> / postprocess (ms)."""
+    if timings is None:
+        return
+    for result in results:
+        add_time(timings, 'preprocess', result.speed.get('preprocess') or 0.0)
+        add_time(timings, predict_key, result.speed.get('inference') or 0.0)
+        add_time(timings, 'postprocess', result.speed.get('postprocess') or 0.0)
+
+
+def boxes_of(result):
+    """Boxes of one ultralytics Result as an (N, 6) float32 array: x1, y1, x2, y2, conf, cls."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return EMPTY.copy()
+    return np.concatenate([
+        boxes.xyxy.cpu().numpy(),
+        boxes.conf.cpu().numpy()[:, None],
+        boxes.cls.cpu().numpy()[:, None]
+    ], axis=1).astype(np.float32)
+
+
+def person_class_ids(model):
+    return [cls for cls, name in model.names.items() if name == 'person']
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4+) and (M, 4+) xyxy boxes."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def nms(boxes, iou=0.5):
+    """Drop duplicates (e.g. one face seen through two overlapping person crops), best conf first."""
+    if len(boxes) < 2:
+        return boxes
+    boxes = boxes[np.argsort(-boxes[:, 4])]
+    overlaps = iou_matrix(boxes, boxes)
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if keep[i]:
+            keep[i + 1:] &= overlaps[i, i + 1:] < iou
+    return boxes[keep]
+
+
+def detect_persons(human_model, frame, device, imgsz=PERSON_IMGSZ, timings=None):
+    results = human_model.predict(source=frame, imgsz=imgsz, device=device, conf=PERSON_CONF,
+                                  classes=person_class_ids(human_model), verbose=False)
+    add_speed(timings, results, 'human_predict')
+    return boxes_of(results[0])
+
+
+def crop_regions(frame, regions, margin=CROP_MARGIN):
+    """Crops of frame around each xyxy region (grown by margin), with their top-left offsets."""
+    height, width = frame.shape[:2]
+    crops, offsets = [], []
+    for x1, y1, x2, y2 in regions[:, :4]:
+        dx, dy = (x2 - x1) * margin, (y2 - y1) * margin
+        cx1, cy1 = int(max(x1 - dx, 0)), int(max(y1 - dy, 0))
+        cx2, cy2 = int(min(x2 + dx, width)), int(min(y2 + dy, height))
+        if cx2 - cx1 < 8 or cy2 - cy1 < 8:
+            continue
+        crops.append(frame[cy1:cy2, cx1:cx2])
+        offsets.append((cx1, cy1))
+    return crops, offsets
+
+
+def detect_faces_in_regions(face_model, frame, regions, device, imgsz=FACE_CROP_IMGSZ, timings=None):
+    """Run the face model once, batched, over the given regions and map boxes back to frame coordinates."""
+    start = time.perf_counter()
+    crops, offsets = crop_regions(frame, regions)
+    add_time(timings, 'preprocess', (time.perf_counter() - start) * 1000)
+    if not crops:
+        return EMPTY.copy()
+    results = face_model.predict(source=crops, imgsz=imgsz, device=device, conf=FACE_CONF, iou=FACE_IOU, verbose=False)
+    add_speed(timings, results, 'face_predict')
+
+    start = time.perf_counter()
+    found = []
+    for result, (ox, oy) in zip(results, offsets):
+        boxes = boxes_of(result)
+        boxes[:, [0, 2]] += ox
+        boxes[:, [1, 3]] += oy
+        found.append(boxes)
+    faces = nms(np.concatenate(found))
+    add_time(timings, 'postprocess', (time.perf_counter() - start) * 1000)
+    return faces
+
+
+def detect_full(face_model, human_model, frame, device, imgsz=None, timings=None):
+    """Original path: both models on the full frame, at full resolution unless imgsz is given."""
+    imgsz = imgsz or frame.shape[:2]
+    face_results = face_model.predict(source=frame, imgsz=imgsz, device=device,
+                                      conf=FACE_CONF, iou=FACE_IOU, verbose=False)
+    add_speed(timings, face_results, 'face_predict')
+    human_results = human_model.predict(source=frame, imgsz=imgsz, device=device,
+                                        conf=PERSON_CONF, verbose=False)
+    add_speed(timings, human_results, 'human_predict')
+    faces = boxes_of(face_results[0])
+    humans = boxes_of(human_results[0])
+    persons = humans[np.isin(humans[:, 5], person_class_ids(human_model))]
+    return faces, persons
+
+
+def detect_cascade(face_model, human_model, frame, device, imgsz=None, timings=None):
+    """Cheap person pass first; the face model only runs on person crops, and not at all on empty frames."""
+    persons = detect_persons(human_model, frame, device, imgsz=imgsz or PERSON_IMGSZ, timings=timings)
+    if len(persons) == 0:
+        return EMPTY.copy(), persons
+    faces = detect_faces_in_regions(face_model, frame, persons, device, imgsz=imgsz or FACE_CROP_IMGSZ, timings=timings)
+    return faces, persons
+
+
+def detect(face_model, human_model, frame, device, cascade=True, imgsz=None, timings=None):
+    """(faces, persons) as (N, 6) arrays: x1, y1, x2, y2, conf, cls.
+
+    imgsz overrides the model input size (both cascade passes, or the full-frame
+    pass, which otherwise runs at the frame's own size). If a dict is passed as
+    timings, per-stage milliseconds (preprocess, face_predict, human_predict,
+    postprocess) are added to it.
+    """
+    if cascade:
+        return detect_cascade(face_model, human_model, frame, device, imgsz=imgsz, timings=timings)
+    return detect_full(face_model, human_model, frame, device, imgsz=imgsz, timings=timings)
+
+
+def as_single_class(faces):
+    """Treat every face class as plain "face": class-agnostic NMS, class column set to 0."""
+    faces = nms(faces)
+    faces[:, 5] = 0
+    return faces
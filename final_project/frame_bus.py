@@ -0,0 +1,226 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+# Layout of the shared-memory block:
+#   header  int64[8]        MAGIC, slots, height, width, channels, write_seq, 0, 0
+#   seqs    int64[slots]    sequence number of the frame in each slot (-1 while being written)
+#   times   float64[slots]  capture timestamp of each slot
+#   frames  uint8[slots, height, width, channels]
+MAGIC = 0x46524D42  # "FRMB"
+HEADER_LEN = 8
+WRITE_SEQ = 5
+
+
+def _layout(slots, height, width, channels):
+    seqs_off = HEADER_LEN * 8
+    times_off = seqs_off + slots * 8
+    frames_off = times_off + slots * 8
+    size = frames_off + slots * height * width * channels
+    return seqs_off, times_off, frames_off, size
+
+
+def _attach(name):
+    """Open an existing segment without letting this process' resource tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class _FrameRing:
+    def _map(self, shm, slots, height, width, channels):
+        seqs_off, times_off, frames_off, _ = _layout(slots, height, width, channels)
+        self.shape = (height, width, channels)
+        self.slots = slots
+        self.header = np.ndarray((HEADER_LEN,), dtype=np.int64, buffer=shm.buf)
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=seqs_off)
+        self.times = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=times_off)
+        self.frames = np.ndarray((slots, height, width, channels), dtype=np.uint8, buffer=shm.buf, offset=frames_off)
+
+    def _unmap(self):
+        # Views must be dropped before the segment can be closed
+        self.header = self.seqs = self.times = self.frames = None
+
+
+class FrameBusWriter(_FrameRing):
+    """Single producer: writes decoded frames into a shared-memory ring. Never waits on readers."""
+
+    def __init__(self, name, shape, slots=4):
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        size = _layout(slots, height, width, channels)[3]
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a crashed producer: replace it
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._map(self.shm, slots, height, width, channels)
+        self.seqs[:] = -1
+        self.header[:] = [MAGIC, slots, height, width, channels, 0, 0, 0]
+        self.seq = 0
+
+    def write(self, frame, timestamp=None):
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0])).reshape(self.shape)
+        self.seq += 1
+        slot = self.seq % self.slots
+        self.seqs[slot] = -1                 # readers skip a slot being written
+        self.frames[slot] = frame
+        self.times[slot] = time.time() if timestamp is None else timestamp
+        self.seqs[slot] = self.seq
+        self.header[WRITE_SEQ] = self.seq
+        return self.seq
+
+    def close(self):
+        self._unmap()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameBusReader(_FrameRing):
+    """Any number of consumers can attach by name and read the newest frame in place."""
+
+    def __init__(self, name):
+        self.shm = _attach(name)
+        header = np.ndarray((HEADER_LEN,), dtype=np.int64, buffer=self.shm.buf)
+        if header[0] != MAGIC:
+            self.shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a frame bus")
+        slots, height, width, channels = (int(v) for v in header[1:5])
+        del header
+        self._map(self.shm, slots, height, width, channels)
+
+    @property
+    def write_seq(self):
+        return int(self.header[WRITE_SEQ])
+
+    def latest(self, after_seq=0):
+        """(seq, timestamp, frame) for the newest frame newer than after_seq, else None.
+
+        frame is a read-only view into shared memory (no copy). The producer will
+        reuse its slot after `slots` more frames; check is_current(seq) after use,
+        or call read_copy() when the frame must outlive that.
+        """
+        seq = self.write_seq
+        if seq <= after_seq:
+            return None
+        slot = seq % self.slots
+        if self.seqs[slot] != seq:
+            return None
+        view = self.frames[slot]
+        view.flags.writeable = False
+        return seq, float(self.times[slot]), view
+
+    def is_current(self, seq):
+        """True while the slot holding frame `seq` has not been overwritten."""
+        return self.seqs[seq % self.slots] == seq
+
+    def read_copy(self, after_seq=0):
+        """Like latest(), but returns a private copy that is verified not to be torn."""
+        for _ in range(3):
+            item = self.latest(after_seq)
+            if item is None:
+                return None
+            seq, timestamp, view = item
+            frame = view.copy()
+            if self.is_current(seq):
+                return seq, timestamp, frame
+        return None
+
+    def close(self):
+        self._unmap()
+        self.shm.close()
+
+
+class BusCapture:
+    """cv2.VideoCapture-like wrapper so existing loops can read from the bus unchanged.
+
+    read() hands out a private copy because callers draw on the frame.
+    """
+
+    def __init__(self, name, timeout=5.0):
+        self.reader = FrameBusReader(name)
+        self.timeout = timeout
+        self.last_seq = 0
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            item = self.reader.read_copy(self.last_seq)
+            if item is not None:
+                self.last_seq = item[0]
+                return True, item[2]
+            time.sleep(0.002)
+        return False, None
+
+    def release(self):
+        if self._open:
+            self.reader.close()
+            self._open = False
+
+
+def open_capture(source):
+    """Read from the shared frame bus named by $FRAME_BUS if a producer is running,
+    otherwise open the source directly with cv2.VideoCapture."""
+    name = os.environ.get('FRAME_BUS')
+    if name:
+        try:
+            return BusCapture(name)
+        except (FileNotFoundError, ValueError):
+            print(f"Frame bus '{name}' not available, opening {source} directly.")
+    return cv2.VideoCapture(source)
+
+
+# === PRODUCER ===
+def produce(source, name, slots=4, max_backoff=30.0):
+    writer = None
+    backoff = 0.5
+    try:
+        while True:
+            cap = cv2.VideoCapture(source)
+            got_frame = False
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if writer is None:
+                    writer = FrameBusWriter(name, frame.shape, slots=slots)
+                    print(f"Publishing {frame.shape[1]}x{frame.shape[0]} frames on bus '{name}'")
+                writer.write(frame)
+                got_frame = True
+            cap.release()
+            backoff = 0.5 if got_frame else min(backoff * 2, max_backoff)
+            print(f"Source lost, reconnecting in {backoff:.1f}s")
+            time.sleep(backoff)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Decode a camera once and share frames with local consumers.')
+    parser.add_argument('source', help='Camera URL, video file or webcam index.')
+    parser.add_argument('--name', default=os.environ.get('FRAME_BUS', 'door_cam'), help='Shared memory name.')
+    parser.add_argument('--slots', type=int, default=4, help='Frames kept in the ring.')
+    args = parser.parse_args()
+    source = int(args.source) if args.source.isdigit() else args.source
+    sys.exit(produce(source, args.name, slots=args.slots))
@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+UNKNOWN = 'unknown'
+
+
+class GalleryIdentifier:
+    """Identity by Facenet512 embedding lookup against the backend's faces_db gallery.
+
+    Uses the backend's own gallery code (smart-home-backend/scripts, next to faces_db),
+    so both stacks read and write the same gallery.bin/gallery.json under its file lock.
+    Enrolling someone is just adding images under faces_db/<name>/; the gallery is re-synced
+    when a person folder changes (checked every refresh_every seconds), and the backend
+    worker picks up the new rows on its next lookup.
+    """
+
+    def __init__(self, db_path, threshold=None, refresh_every=10.0):
+        self.db_path = os.path.abspath(db_path)
+        scripts_dir = os.path.join(os.path.dirname(self.db_path), 'scripts')
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import face_gallery
+        import face_index
+        self._gallery_module = face_gallery
+        self._index_module = face_index
+        self.threshold = threshold if threshold is not None else face_index.THRESHOLDS['cosine']
+        self.refresh_every = refresh_every
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self.index = None
+        self.reload()
+
+    def reload(self):
+        """Sync the on-disk gallery (embeds only new images) and rebuild the in-memory index.
+
+        sync() holds the gallery's file lock, so this never races the backend worker or the
+        one-shot scripts; the index is built from a snapshot taken under the same lock."""
+        signature = self._gallery_module.folder_signature(self.db_path)
+        gallery = self._gallery_module.FaceGallery(self.db_path)
+        added = gallery.sync()
+        index = self._gallery_module.build_index(gallery)
+        with self._lock:
+            self.index = index
+            self._signature = signature
+        print(f"Gallery: {len(index)} embeddings of {len(set(index.labels))} people ({added} newly embedded)")
+
+    def maybe_reload(self):
+        now = time.time()
+        if now - self._checked_at < self.refresh_every:
+            return
+        self._checked_at = now
+        if self._gallery_module.folder_signature(self.db_path) != self._signature:
+            self.reload()
+
+    def embed(self, crop):
+        """Embedding of the face in a BGR crop. The crop is re-detected and aligned with the
+        same SSD detector the gallery was built with, so the vectors are comparable."""
+        faces = [f for f in self._index_module.detect_faces(crop) if f.get('confidence', 0) > 0]
+        if faces:
+            face = max(faces, key=lambda f: f['facial_area']['w'] * f['facial_area']['h'])['face']
+        else:
+            face = crop[:, :, ::-1].astype(np.float32) / 255.0  # detector missed it: use the YOLO crop as is
+        return self._index_module.embed_faces([face])[0]
+
+    def identify(self, embedding):
+        """(name, distance) of the best gallery match, or (UNKNOWN, distance) above the threshold."""
+        with self._lock:
+            index = self.index
+        distances, indices = index.search(embedding, k=1)
+        if distances.shape[1] == 0:
+            return UNKNOWN, 1.0
+        distance = float(distances[0, 0])
+        if distance > self.threshold:
+            return UNKNOWN, distance
+        return index.labels[indices[0, 0]], distance
+
+
+class TrackIdentities:
+    """Runs embedding lookups for tracks that have no identity yet, on one background
+    thread so the inference loop never waits on the embedding model.
+
+    Embeddings are cached per track; each lookup queries with the mean of the track's
+    embeddings so far and becomes one vote in the tracker. A track stops being embedded
+    once it is decided or has max_embeddings samples.
+    """
+
+    def __init__(self, identifier, tracker, max_embeddings=5, margin=0.2):
+        self.identifier = identifier
+        self.tracker = tracker
+        self.max_embeddings = max_embeddings
+        self.margin = margin
+        self.embeddings = {}      # track id -> list of embeddings
+        self.pending = {}         # track id -> future
+        self.pool = ThreadPoolExecutor(max_workers=1)
+
+    def _crop(self, frame, box):
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = box
+        dx, dy = (x2 - x1) * self.margin, (y2 - y1) * self.margin
+        x1, y1 = int(max(x1 - dx, 0)), int(max(y1 - dy, 0))
+        x2, y2 = int(min(x2 + dx, width)), int(min(y2 + dy, height))
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            return None
+        return frame[y1:y2, x1:x2].copy()
+
+    def submit(self, frame, tracks):
+        """Queue a lookup for every undecided track that has none in flight."""
+        live = {track["id"] for track in tracks}
+        for track_id in [t for t in self.embeddings if t not in live]:
+            del self.embeddings[track_id]
+        for track in tracks:
+            track_id = track["id"]
+            if track["confirmed"] or track_id in self.pending:
+                continue
+            if len(self.embeddings.get(track_id, ())) >= self.max_embeddings:
+                continue
+            crop = self._crop(frame, track["box"])
+            if crop is not None:
+                self.pending[track_id] = self.pool.submit(self._lookup, crop)
+
+    def _lookup(self, crop):
+        self.identifier.maybe_reload()
+        return self.identifier.embed(crop)
+
+    def collect(self):
+        """Turn finished lookups into tracker votes; returns newly confirmed (track_id, name)."""
+        confirmed = []
+        for track_id, future in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[track_id]
+            try:
+                embedding = future.result()
+            except Exception as e:
+                print(f"Embedding failed for track {track_id}: {e}")
+                continue
+            samples = self.embeddings.setdefault(track_id, [])
+            samples.append(embedding / max(np.linalg.norm(embedding), 1e-10))
+            name, distance = self.identifier.identify(np.mean(samples, axis=0))
+            decided = self.tracker.add_vote(track_id, name, max(1.0 - distance, 0.05))
+            if decided:
+                confirmed.append(decided)
+        return confirmed
+
+    def close(self):
+        self.pool.shutdown(wait=False)
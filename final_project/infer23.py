@@ -1,146 +1,157 @@
 import cv2
-from ultralytics import YOLO
 import time
-from collections import deque
 import pyttsx3
 import threading
-import queue
-import speech_recognition as sr
+import os
+from frame_bus import open_capture
+from pipeline import LatestQueue, RateMeter
+from detection import detect, as_single_class
+from backends import load_config, load_models
+from tracker import Tracker, draw_tracks
+from tts_cache import SpeechQueue
+from voice import VoiceListener, make_recognizer
+from identity import GalleryIdentifier, TrackIdentities, UNKNOWN
 
 # --- TTS Engine Setup ---
-tts_queue = queue.Queue()
 engine = pyttsx3.init()
 engine.setProperty('rate', 160)
 
-def tts_worker():
-    while True:
-        text = tts_queue.get()
-        if text is None:
-            break  # None is the signal to exit
-        engine.say(text)
-        engine.runAndWait()
-        tts_queue.task_done()
-
-# Start the background thread
-tts_thread = threading.Thread(target=tts_worker, daemon=True)
-tts_thread.start()
-
-def speak(text):
-    tts_queue.put(text)
-
-# --- Speech Recognition ---
-def recognize_speech():
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening for commands...")
-        recognizer.pause_threshold = 1
-        try:
-            audio = recognizer.listen(source, timeout=5)
-            query = recognizer.recognize_google(audio, language='en-US')
-            print("You said:", query)
-            return query.lower()
-        except sr.WaitTimeoutError:
-            return ""
-        except sr.UnknownValueError:
-            return ""
-        except sr.RequestError:
-            return ""
-
-def speech_listener():
-    while True:
-        query = recognize_speech()
-        if not query:
-            continue
-        if "time" in query:
-            now = time.strftime("%I:%M %p")
-            speak(f"It is {now}")
-        elif "hello" in query:
-            speak("Hello boss!")
-        elif "stop listening" in query:
-            speak("Okay, I'll be quiet.")
-            break
-        else:
-            speak("Sorry, I didn't understand that.")
-
-# --- Load YOLO Models ---
-face_model = YOLO(r"C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\runs\detect\yolo11_face_wo_QA_final\weights\best.pt")
-human_model = YOLO(r"C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\yolo11n.pt")
+# Fixed phrases are rendered to tts_cache/ once and played from memory afterwards;
+# names are rendered on first use, and text like the current time goes straight to pyttsx3.
+GREETINGS = ["Hi there", "Face confirmed. Hello master.", "Hello boss!",
+             "Okay, I'll be quiet.", "Sorry, I didn't understand that."]
+tts = SpeechQueue(engine, cache_dir='tts_cache', preload=GREETINGS)
+
+def speak(text, cache=True):
+    tts.put(text, cache=cache)
+
+# --- Speech Recognition (one open mic stream, VAD-gated; recognizer only runs on speech) ---
+def handle_command(command, query):
+    if command == "time":
+        now = time.strftime("%I:%M %p")
+        speak(f"It is {now}", cache=False)
+    elif command == "hello":
+        speak("Hello boss!")
+    elif command == "stop":
+        speak("Okay, I'll be quiet.")
+        return False
+    else:
+        speak("Sorry, I didn't understand that.")
+
+voice_listener = VoiceListener(make_recognizer(os.environ.get("VOICE_RECOGNIZER", "google")), handle_command)
+
+# --- Load YOLO Models (runtime/device/weights from inference.yaml) ---
+config = load_config()
+face_model, human_model, DEVICE = load_models(config)
+CASCADE = config['cascade']  # person detector first, face model only on person crops
+DETECT_EVERY = config['detect_every']  # run the detector every N frames, the tracker carries boxes in between
+EMBEDDING = config['recognition'] == 'embedding'  # YOLO finds faces, the faces_db gallery says who they are
 
 url = 'http://172.16.133.233:8080/video'
-cap = cv2.VideoCapture(url)
+cap = open_capture(url)  # shared frame bus if $FRAME_BUS is published, else direct
 
 # --- Detection State Tracking ---
-other_class_detections = deque()
+if EMBEDDING:
+    tracker = Tracker(face_model.names, min_votes=2, class_votes=False)
+    identities = TrackIdentities(GalleryIdentifier(config['gallery'], config['match_threshold']), tracker)
+else:
+    tracker = Tracker(face_model.names)
 spoken_names = set()
 audio_played = {"hi_there": False, "hello_master": False}
 speak_names = {'Viet_Dat', 'Thanh', 'Hung', 'QA', 'Triet'}
 ignored_names = {}
 
-# --- Main Loop ---
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    start_time = time.time()
-    now = time.time()
-    detected_human = False
-
-    results = face_model.predict(source=frame, imgsz=frame.shape[:2], device='cuda', conf=0.46, iou=0.72)
-    results_human = human_model.predict(source=frame, imgsz=frame.shape[:2], device='cuda', conf=0.4)
-
-    for r in results:
-        for box in r.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            conf = box.conf[0]
-            cls = int(box.cls[0])
-            label_name = face_model.names[cls]
+# --- Pipeline: capture -> inference -> render, joined by latest-wins queues ---
+frame_queue = LatestQueue(maxsize=1)    # newest camera frame; stale frames are dropped
+result_queue = LatestQueue(maxsize=1)   # newest (frame, detections)
+stop_event = threading.Event()
+meters = {name: RateMeter(name) for name in ("capture", "inference", "detector", "render")}
 
-            if label_name in ignored_names:
-                continue
-
-            if label_name in speak_names and label_name not in spoken_names:
-                speak(label_name)
-                spoken_names.add(label_name)
-
-            if label_name != 'person':
-                other_class_detections.append((now, label_name))
+def capture_loop():
+    while not stop_event.is_set() and cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_queue.put((time.time(), frame))
+        meters["capture"].tick()
+    stop_event.set()
+
+def inference_loop():
+    frame_idx = 0
+    persons = None
+    while not stop_event.is_set():
+        item = frame_queue.get(timeout=0.5)
+        if item is None:
+            continue
+        captured_at, frame = item
+        if frame_idx % DETECT_EVERY == 0 or persons is None:
+            faces, persons = detect(face_model, human_model, frame, DEVICE, cascade=CASCADE)
+            if EMBEDDING:
+                faces = as_single_class(faces)
+            tracks, confirmed = tracker.update(faces)
+            if EMBEDDING:
+                identities.submit(frame, tracks)  # embeddings run in the background, once per track
+            meters["detector"].tick()
+        else:
+            tracks, confirmed = tracker.predict(), []
+        if EMBEDDING:
+            confirmed = confirmed + identities.collect()
+        frame_idx += 1
+        result_queue.put((captured_at, frame, tracks, confirmed, persons))
+        meters["inference"].tick()
 
-            label = f"{label_name} {conf:.2f}"
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+def handle_detections(frame, tracks, confirmed, persons):
+    detected_human = len(persons) > 0
 
-    for rh in results_human:
-        for box in rh.boxes:
-            cls = int(box.cls[0])
-            label = human_model.names[cls]
-            if label == 'person':
-                detected_human = True
-                break
+    draw_tracks(frame, [track for track in tracks if track["name"] not in ignored_names])
 
     if detected_human and not audio_played["hi_there"]:
         speak("Hi there")
         audio_played["hi_there"] = True
 
-    # Clean up old detections
-    while other_class_detections and now - other_class_detections[0][0] > 60:
-        other_class_detections.popleft()
-
-    if len(other_class_detections) >= 3 and not audio_played["hello_master"]:
-        speak("Face confirmed. Hello master.")
-        audio_played["hello_master"] = True
-        # Start speech listener in new thread
-        threading.Thread(target=speech_listener, daemon=True).start()
+    # One identity decision per track (per person per visit)
+    for track_id, label_name in confirmed:
+        if label_name in ignored_names or label_name in ('person', UNKNOWN):
+            continue
 
-    fps = 1 / (time.time() - start_time)
-    cv2.putText(frame, f"FPS: {fps:.2f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        # In embedding mode everyone enrolled in faces_db is greeted by name
+        if (EMBEDDING or label_name in speak_names) and label_name not in spoken_names:
+            speak(label_name)
+            spoken_names.add(label_name)
+
+        if not audio_played["hello_master"]:
+            speak("Face confirmed. Hello master.")
+            audio_played["hello_master"] = True
+            voice_listener.start()
+
+threading.Thread(target=capture_loop, daemon=True).start()
+threading.Thread(target=inference_loop, daemon=True).start()
+
+# --- Main Loop (render; cv2.imshow must stay on the main thread) ---
+while not stop_event.is_set():
+    item = result_queue.get(timeout=0.5)
+    if item is None:
+        continue
+    captured_at, frame, tracks, confirmed, persons = item
+
+    handle_detections(frame, tracks, confirmed, persons)
+    meters["render"].tick()
+
+    latency_ms = (time.time() - captured_at) * 1000
+    stats = " | ".join(f"{name}: {meter.fps:.1f}" for name, meter in meters.items())
+    cv2.putText(frame, f"FPS {stats}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+    cv2.putText(frame, f"Latency: {latency_ms:.0f} ms  dropped: {frame_queue.dropped}", (10, 55),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
     cv2.imshow("YOLO Real-Time Inference", frame)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
 # Cleanup
+stop_event.set()
 cap.release()
 cv2.destroyAllWindows()
-tts_queue.put(None)  # Stop the TTS thread
-tts_thread.join()
+voice_listener.stop()
+if EMBEDDING:
+    identities.close()
+tts.stop()
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from dataset_index import load_index
+
+CACHE_ARRAY = '.labels_cache.npy'
+CACHE_META = '.labels_cache.json'
+COLUMNS = ('file', 'class', 'cx', 'cy', 'w', 'h')
+EDGE_TOLERANCE = 1e-3     # rounding slack for boxes touching the border
+MIN_BOX_AREA = 1e-4       # normalized w*h below this is treated as degenerate
+TINY_BOX_AREA = 0.002     # below this a face is too small to be useful (warning)
+MAX_ASPECT = 2.5          # w/h (or h/w) beyond this is odd for a face (warning)
+WARNINGS = ('tiny', 'odd_aspect')   # worth a look, but not failures for --strict
+
+
+def parse_label_file(label_path):
+    """(N, 5) float32 rows of class, cx, cy, w, h and the number of malformed lines."""
+    rows, bad = [], 0
+    with open(label_path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                values = [float(v) for v in parts]
+            except ValueError:
+                bad += 1
+                continue
+            if len(values) != 5:
+                bad += 1
+                continue
+            rows.append(values)
+    return np.array(rows, dtype=np.float32).reshape(-1, 5), bad
+
+
+class LabelTable:
+    """Every box of the dataset in one (N, 6) float32 array: file index, class, cx, cy, w, h.
+
+    files[i] is the (image path, label path, person) of file index i. The array is cached
+    next to the dataset manifest (.npy + .json) and only label files whose mtime changed
+    are re-parsed."""
+
+    def __init__(self, root, label_root=None):
+        self.index = load_index(root, label_root)
+        self.array_path = os.path.join(self.index.root, CACHE_ARRAY)
+        self.meta_path = os.path.join(self.index.root, CACHE_META)
+        self.files = []
+        self.boxes = np.empty((0, 6), dtype=np.float32)
+        self.malformed = np.empty(0, dtype=np.int32)
+        self.reparsed = 0
+        self._build()
+
+    def _load_cache(self):
+        if not (os.path.exists(self.array_path) and os.path.exists(self.meta_path)):
+            return {}, None
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            boxes = np.load(self.array_path)
+        except (ValueError, OSError):
+            return {}, None
+        # label path -> (old file index, label mtime, malformed count)
+        cached = {path: (i, mtime, bad) for i, (path, mtime, bad) in enumerate(meta['files'])}
+        return cached, boxes
+
+    def _build(self):
+        cached, old_boxes = self._load_cache()
+        entries = self.index.entries(labeled=True)
+
+        keep_old, parts, malformed, meta_files = [], [], [], []
+        old_to_new = np.full(len(cached), -1, dtype=np.int64)
+        for i, entry in enumerate(entries):
+            self.files.append((entry.path, entry.label_path, entry.person))
+            # stat the label itself: an edit in place doesn't change its folder's mtime,
+            # so the manifest's label_mtime can lag behind
+            mtime = os.stat(entry.label_path).st_mtime_ns
+            hit = cached.get(entry.label_path)
+            if hit is not None and hit[1] == mtime:
+                old_to_new[hit[0]] = i
+                keep_old.append(hit[0])
+                bad = hit[2]
+            else:
+                rows, bad = parse_label_file(entry.label_path)
+                parts.append(np.column_stack([np.full(len(rows), i, dtype=np.float32), rows]))
+                self.reparsed += 1
+            malformed.append(bad)
+            meta_files.append((entry.label_path, mtime, bad))
+
+        if old_boxes is not None and keep_old:
+            # Unchanged files: take their rows from the cache and renumber the file column in one go
+            reused = old_boxes[old_to_new[old_boxes[:, 0].astype(np.int64)] >= 0].copy()
+            reused[:, 0] = old_to_new[reused[:, 0].astype(np.int64)]
+            parts.insert(0, reused)
+        if parts:
+            boxes = np.concatenate(parts)
+            self.boxes = boxes[np.argsort(boxes[:, 0], kind='stable')]
+        self.malformed = np.array(malformed, dtype=np.int32)
+        # boxes are sorted by file: rows of file i are offsets[i]:offsets[i + 1]
+        self.offsets = np.searchsorted(self.boxes[:, 0], np.arange(len(self.files) + 1))
+
+        if self.reparsed or len(cached) != len(entries):
+            np.save(self.array_path, self.boxes)
+            with open(self.meta_path, 'w', encoding='utf-8') as f:
+                json.dump({"columns": COLUMNS, "files": meta_files}, f)
+
+    # --- lookups ---
+    def file_boxes(self, i):
+        """(N, 5) rows of class, cx, cy, w, h of file index i."""
+        return self.boxes[self.offsets[i]:self.offsets[i + 1], 1:]
+
+    def largest_boxes(self):
+        """(files, 2) normalized w, h of each file's largest box; zeros for files without boxes."""
+        largest = np.zeros((len(self.files), 2), dtype=np.float32)
+        if len(self.boxes):
+            b = self.boxes
+            order = np.lexsort((b[:, 4] * b[:, 5], b[:, 0]))   # by file, then by area
+            last = order[self.offsets[1:][self.offsets[1:] > self.offsets[:-1]] - 1]
+            largest[b[last, 0].astype(np.int64)] = b[last, 4:6]
+        return largest
+
+    # --- validation ---
+    def validate(self, names):
+        """Boolean masks over boxes (and over files for per-file rules), keyed by rule name.
+        Without names (no class list) the class rules are skipped."""
+        b = self.boxes
+        cls, cx, cy, w, h = b[:, 1], b[:, 2], b[:, 3], b[:, 4], b[:, 5]
+        lo, hi = -EDGE_TOLERANCE, 1 + EDGE_TOLERANCE
+        aspect = w / np.maximum(h, 1e-6)
+
+        # Class each file should carry: its person folder's position in face_data.yaml names
+        name_to_id = {name: i for i, name in enumerate(names)}
+        expected = np.array([name_to_id.get(person, -1) for _, _, person in self.files], dtype=np.float32)
+
+        boxes_per_file = np.bincount(b[:, 0].astype(np.int64), minlength=len(self.files))
+        box_rules = {
+            "out_of_range": ((b[:, 2:] < 0) | (b[:, 2:] > 1)).any(axis=1)
+                            | (cx - w / 2 < lo) | (cx + w / 2 > hi) | (cy - h / 2 < lo) | (cy + h / 2 > hi),
+            "degenerate": (w <= 0) | (h <= 0) | (w * h < MIN_BOX_AREA),
+            "tiny": (w * h >= MIN_BOX_AREA) & (w * h < TINY_BOX_AREA),
+            "odd_aspect": (w > 0) & (h > 0) & ((aspect > MAX_ASPECT) | (aspect < 1 / MAX_ASPECT)),
+        }
+        if names:
+            box_rules["bad_class"] = (cls != np.round(cls)) | (cls < 0) | (cls >= len(names))
+            box_rules["wrong_person"] = (expected[b[:, 0].astype(np.int64)] >= 0) & (cls != expected[b[:, 0].astype(np.int64)])
+        file_rules = {
+            "multi_face": boxes_per_file > 1,
+            "empty": boxes_per_file == 0,
+            "malformed": self.malformed > 0,
+        }
+        return box_rules, file_rules
+
+    def file_reasons(self, names):
+        """Per file, the names of the rules it fails (empty list: the label looks fine)."""
+        box_rules, file_rules = self.validate(names)
+        reasons = [[] for _ in self.files]
+        file_index = self.boxes[:, 0].astype(np.int64)
+        for rule, mask in box_rules.items():
+            for i in np.unique(file_index[mask]):
+                reasons[i].append(rule)
+        for rule, mask in file_rules.items():
+            for i in np.flatnonzero(mask):
+                reasons[i].append(rule)
+        return reasons
+
+    # --- statistics ---
+    def stats(self, names, bins=10):
+        b = self.boxes
+        area = b[:, 4] * b[:, 5]
+        aspect = b[:, 4] / np.maximum(b[:, 5], 1e-6)
+        boxes_per_file = np.bincount(b[:, 0].astype(np.int64), minlength=len(self.files))
+        class_counts = np.bincount(np.clip(b[:, 1], 0, None).astype(np.int64), minlength=len(names))
+        return {
+            "files": len(self.files),
+            "boxes": len(b),
+            "per_class": {(names[i] if i < len(names) else str(i)): int(n) for i, n in enumerate(class_counts)},
+            "boxes_per_image": {int(k): int(n) for k, n in enumerate(np.bincount(boxes_per_file)) if n},
+            "area_hist": [a.tolist() for a in np.histogram(area, bins=bins, range=(0, 1))],
+            "aspect_hist": [a.tolist() for a in np.histogram(aspect, bins=bins, range=(0, 2.5))],
+        }
+
+
+def load_names(yaml_path):
+    import yaml
+    with open(yaml_path, 'r') as f:
+        return list(yaml.safe_load(f)['names'])
+
+
+def main(args):
+    start = time.perf_counter()
+    table = LabelTable(args.root, args.label_root)
+    names = load_names(args.names)
+    box_rules, file_rules = table.validate(names)
+    stats = table.stats(names)
+    elapsed = time.perf_counter() - start
+
+    print(f"{stats['files']} label files, {stats['boxes']} boxes "
+          f"({table.reparsed} files re-parsed) in {elapsed * 1000:.0f} ms")
+    print("Per class:", stats['per_class'])
+    print("Boxes per image:", stats['boxes_per_image'])
+    counts, edges = stats['area_hist']
+    print("Box area:", ", ".join(f"<{edges[i + 1]:.1f}: {n}" for i, n in enumerate(counts) if n))
+
+    problems = 0
+    for rule, mask in box_rules.items():
+        files = np.unique(table.boxes[mask, 0].astype(np.int64))
+        if rule not in WARNINGS:
+            problems += len(files)
+        print(f"{rule}: {int(mask.sum())} boxes in {len(files)} files")
+        for i in files[:args.show]:
+            print(f"    {table.files[i][1]}")
+    for rule, mask in file_rules.items():
+        files = np.flatnonzero(mask)
+        problems += len(files)
+        print(f"{rule}: {len(files)} files")
+        for i in files[:args.show]:
+            print(f"    {table.files[i][1]}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats, f, indent=1)
+    if args.strict and problems:
+        sys.exit(1)
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Validate all YOLO labels of a dataset and print statistics.')
+    parser.add_argument('root', type=str, help='Dataset root with one folder per person.')
+    parser.add_argument('--label_root', type=str, default=None, help='Separate label tree (root/<person> layout).')
+    parser.add_argument('--names', type=str, default='face_data.yaml', help='YAML with the class names used for training.')
+    parser.add_argument('--show', type=int, default=5, help='Example files listed per rule.')
+    parser.add_argument('--json', type=str, default='', help='Also write the statistics as JSON.')
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with status 1 if any rule except the warnings (tiny, odd_aspect) fails.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(get_arguments())
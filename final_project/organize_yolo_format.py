@@ -1,37 +1,132 @@
+import hashlib
+import json
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataset_index import load_index, file_sha1, dir_mtime
 
-def organize_dataset_face(train_dir='Train', label_dir='labels', output_dir=r'C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\dataset_face'):
-    # List all categories from Train folder
-    categories = [d for d in os.listdir(train_dir) if os.path.isdir(os.path.join(train_dir, d))]
+SYNC_STATE = '.sync_state.json'
 
-    for category in categories:
-        # Define source paths
-        src_images = os.path.join(train_dir, category)
-        src_labels = os.path.join(label_dir, category)
+def person_signature(entries):
+    """Changes whenever an image or label of this person is added, removed or modified."""
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(f"{entry.path}|{entry.size}|{entry.mtime}|{entry.label_path}|{entry.label_mtime}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def up_to_date(src, dst, use_hash=False, src_sha1=None):
+    try:
+        src_stat, dst_stat = os.stat(src), os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(src_stat, dst_stat):  # already hardlinked
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if use_hash:
+        return (src_sha1 or file_sha1(src)) == file_sha1(dst)
+    return int(src_stat.st_mtime) == int(dst_stat.st_mtime)  # copy2 keeps mtime (to the second on some filesystems)
+
+def sync_file(src, dst, mode='copy', use_hash=False, src_sha1=None):
+    """Returns ('skipped' | 'linked' | 'copied', bytes copied)."""
+    if up_to_date(src, dst, use_hash, src_sha1):
+        return 'skipped', 0
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'linked', 0
+        except OSError:
+            pass  # different filesystem: fall back to a copy
+    shutil.copy2(src, dst)
+    return 'copied', os.path.getsize(dst)
+
+def organize_dataset_face(train_dir='Train', label_dir='labels', output_dir=r'C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\dataset_face',
+                          mode='copy', use_hash=False, remove_orphans=False, workers=8, full=True):
+    # full: re-stat every image and label. A label fixed in place (e.g. after reviewing the
+    # contact sheets) doesn't touch its folder's mtime, so a quick refresh would miss it.
+    # Unchanged files are still not re-hashed, only stat'ed.
+    index = load_index(train_dir, label_root=label_dir, full=full)
+
+    state_path = os.path.join(output_dir, SYNC_STATE)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+    summary = {'copied': 0, 'linked': 0, 'skipped': 0, 'bytes': 0, 'orphans': 0, 'persons_skipped': 0}
+    jobs = []
+    orphans = []
+    for category in index.persons():
+        entries = index.entries(category)
+        signature = person_signature(entries)
 
         # Define destination paths
         dst_category = os.path.join(output_dir, category)
         dst_images = os.path.join(dst_category, 'images')
         dst_labels = os.path.join(dst_category, 'labels')
 
+        # Nothing changed on either side since the last sync: don't even stat this person's files
+        if state.get(category) == [signature, dir_mtime(dst_images), dir_mtime(dst_labels)] and not use_hash:
+            summary['persons_skipped'] += 1
+            continue
+
         # Create destination folders
         os.makedirs(dst_images, exist_ok=True)
         os.makedirs(dst_labels, exist_ok=True)
 
-        # Copy images
-        if os.path.exists(src_images):
-            for img_file in os.listdir(src_images):
-                if img_file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                    shutil.copy2(os.path.join(src_images, img_file), dst_images)
+        # Images and their labels
+        wanted = set()
+        for entry in entries:
+            dst = os.path.join(dst_images, os.path.basename(entry.path))
+            jobs.append((category, entry.path, dst, entry.sha1))
+            wanted.add(dst)
+            if entry.label_path:
+                dst = os.path.join(dst_labels, os.path.basename(entry.label_path))
+                jobs.append((category, entry.label_path, dst, None))
+                wanted.add(dst)
+
+        found = [(category, os.path.join(folder, name)) for folder in (dst_images, dst_labels)
+                 for name in os.listdir(folder) if os.path.join(folder, name) not in wanted]
+        orphans.extend(found)
+        if found and not remove_orphans:
+            # Orphans only reported: keep this person out of the shortcut so a later
+            # run with remove_orphans=True still visits it and removes them
+            state.pop(category, None)
+        else:
+            state[category] = signature
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda job: sync_file(job[1], job[2], mode, use_hash, job[3]), jobs)
+        for action, size in results:
+            summary[action] += 1
+            summary['bytes'] += size
+
+    for category, path in orphans:
+        summary['orphans'] += 1
+        if remove_orphans:
+            os.remove(path)
+            print(f"Removed orphan: {path}")
+        else:
+            print(f"Orphan (not in source): {path}")
 
-        # Copy labels
-        if os.path.exists(src_labels):
-            for label_file in os.listdir(src_labels):
-                if label_file.lower().endswith('.txt'):
-                    shutil.copy2(os.path.join(src_labels, label_file), dst_labels)
+    # Remember what was synced, with the destination folder mtimes as they are now
+    for category in index.persons():
+        if isinstance(state.get(category), str):
+            dst_category = os.path.join(output_dir, category)
+            state[category] = [state[category], dir_mtime(os.path.join(dst_category, 'images')),
+                               dir_mtime(os.path.join(dst_category, 'labels'))]
+    state = {category: value for category, value in state.items() if category in index.persons()}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
 
-    print("Dataset organized successfully.")
+    print(f"Dataset organized successfully: {summary['copied']} copied ({summary['bytes'] / 1e6:.1f} MB), "
+          f"{summary['linked']} hardlinked, {summary['skipped']} unchanged, "
+          f"{summary['persons_skipped']} persons untouched, {summary['orphans']} orphans"
+          f"{' removed' if remove_orphans else ''}.")
+    return summary
 
 # Run the function
 organize_dataset_face()
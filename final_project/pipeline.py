@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """Bounded queue whose put() never blocks: when full, the oldest item is
+    dropped so a slow consumer always gets the freshest frame instead of a stale one."""
+
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Oldest queued item, or None if nothing arrives within timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout=timeout):
+                return None
+            return self._items.popleft()
+
+
+class RateMeter:
+    """Events per second over a sliding time window."""
+
+    def __init__(self, name, window=2.0):
+        self.name = name
+        self.window = window
+        self._ticks = deque()
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def tick(self):
+        now = time.time()
+        with self._lock:
+            self.count += 1
+            self._ticks.append(now)
+            while self._ticks and now - self._ticks[0] > self.window:
+                self._ticks.popleft()
+
+    @property
+    def fps(self):
+        with self._lock:
+            if len(self._ticks) < 2:
+                return 0.0
+            span = self._ticks[-1] - self._ticks[0]
+            return (len(self._ticks) - 1) / span if span > 0 else 0.0
@@ -1,8 +1,10 @@
+import hashlib
+import json
 import os
 import shutil
-import random
 import yaml
 import re
+from dataset_index import load_index
 
 # === CONFIGURATION ===
 source_root = 'dataset_face'
@@ -11,79 +13,153 @@ persons = ['Hung', 'QA', 'Thanh', 'Triet', 'Viet_Dat']
 splits = ['train', 'validation', 'test']
 split_ratio = (0.6, 0.35, 0.05)
 image_extensions = ['.jpg', '.jpeg', '.png', '.JPG']
+seed = 42            # same seed + same images -> same split on every machine
+split_mode = 'list'  # 'list': Ultralytics list files, 'hardlink' / 'symlink': link trees, 'copy': full copies
+assignments_path = os.path.join(dest_root, 'split_assignments.json')
 
-# === CREATE DESTINATION FOLDERS ===
-for split in splits:
-    for person in persons:
-        os.makedirs(os.path.join(dest_root, split, person, 'images'), exist_ok=True)
-        os.makedirs(os.path.join(dest_root, split, person, 'labels'), exist_ok=True)
+# === COLLECT IMAGE-LABEL PAIRS (from the persistent dataset manifest) ===
+index = load_index(source_root)
 
-# === COLLECT IMAGE-LABEL PAIRS ===
 def collect_pairs(person):
-    image_dir = os.path.join(source_root, person, 'images')
-    label_dir = os.path.join(source_root, person, 'labels')
-    all_files = os.listdir(image_dir)
-    base_names = []
-
-    for file in all_files:
-        name, ext = os.path.splitext(file)
-        if ext.lower() in image_extensions:
-            label_file = name + '.txt'
-            label_path = os.path.join(label_dir, label_file)
-            if os.path.exists(label_path):
-                base_names.append(name)
-    return base_names
-
-# === SPLIT AND COPY ===
-def split_and_copy(person):
-    base_names = collect_pairs(person)
-    print(f"[{person}] Total pairs: {len(base_names)}")
-
-    random.shuffle(base_names)
-    n_total = len(base_names)
+    return [entry for entry in index.entries(person, labeled=True)
+            if os.path.splitext(entry.path)[1].lower() in image_extensions]
+
+def relative(entry):
+    return os.path.relpath(entry.path, source_root).replace(os.sep, '/')
+
+# === SEEDED, STRATIFIED, INCREMENTAL ASSIGNMENT ===
+def load_assignments():
+    """Previous image -> split decisions; dropped if the seed or ratios changed."""
+    if not os.path.exists(assignments_path):
+        return {}
+    with open(assignments_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('seed') != seed or data.get('split_ratio') != list(split_ratio):
+        print("Seed or split ratio changed, re-splitting from scratch.")
+        return {}
+    return data['assignments']
+
+def seeded_order(rel_path):
+    return hashlib.sha1(f"{seed}:{rel_path}".encode('utf-8')).hexdigest()
+
+def assign_person(pairs, assignments):
+    """Keep every earlier decision; new images fill each split up to its share of the new total,
+    in a seeded order, so the result equals a seeded shuffle-and-slice on a fresh run."""
+    counts = dict.fromkeys(splits, 0)
+    new = []
+    for entry in pairs:
+        split = assignments.get(relative(entry))
+        if split in counts:
+            counts[split] += 1
+        else:
+            new.append(entry)
+
+    n_total = len(pairs)
     n_train = int(split_ratio[0] * n_total)
     n_val = int(split_ratio[1] * n_total)
-    n_test = n_total - n_train - n_val
-
-    splits_data = {
-        'train': base_names[:n_train],
-        'validation': base_names[n_train:n_train + n_val],
-        'test': base_names[n_train + n_val:]
-    }
-
-    for split, names in splits_data.items():
-        print(f"  → {split}: {len(names)} items")
-        for name in names:
-            # Copy image
-            for ext in image_extensions:
-                src_img = os.path.join(source_root, person, 'images', name + ext)
-                if os.path.exists(src_img):
-                    dst_img = os.path.join(dest_root, split, person, 'images', name + ext)
-                    shutil.copy(src_img, dst_img)
-                    break
-            else:
-                print(f"    ⚠️ Image not found for {name}")
-
-            # Copy label
-            src_lbl = os.path.join(source_root, person, 'labels', name + '.txt')
-            dst_lbl = os.path.join(dest_root, split, person, 'labels', name + '.txt')
-            if os.path.exists(src_lbl):
-                shutil.copy(src_lbl, dst_lbl)
-            else:
-                print(f"    ⚠️ Label not found for {name}")
+    targets = {'train': n_train, 'validation': n_val, 'test': n_total - n_train - n_val}
+
+    new.sort(key=lambda entry: seeded_order(relative(entry)))
+    fill = [split for split in splits for _ in range(max(targets[split] - counts[split], 0))]
+    for i, entry in enumerate(new):
+        assignments[relative(entry)] = fill[i] if i < len(fill) else splits[0]
+    return len(new)
+
+# === MATERIALIZE ===
+def up_to_date(src, dst):
+    if split_mode == 'symlink':
+        return os.path.islink(dst) and os.readlink(dst) == os.path.abspath(src)
+    if os.path.islink(dst):
+        return False
+    src_stat, dst_stat = os.stat(src), os.stat(dst)
+    if os.path.samestat(src_stat, dst_stat):  # already hardlinked
+        return True
+    # a copy (or hardlink mode's fallback copy): copy2 keeps mtime (to the second on some filesystems)
+    return src_stat.st_size == dst_stat.st_size and int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+def place(src, dst):
+    """Link or copy src to dst; unchanged destinations are left alone."""
+    if os.path.lexists(dst):
+        if up_to_date(src, dst):
+            return
+        os.remove(dst)
+    if split_mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass  # different filesystem: fall back to a copy
+    elif split_mode == 'symlink':
+        os.symlink(os.path.abspath(src), dst)
+        return
+    shutil.copy2(src, dst)
+
+def materialize(split_entries):
+    if split_mode == 'list':
+        # Trees from an earlier link/copy run are stale now (and copies still take the disk space)
+        for split in splits:
+            split_dir = os.path.join(dest_root, split)
+            if os.path.isdir(split_dir):
+                shutil.rmtree(split_dir)
+        # Ultralytics finds each label by swapping /images/ for /labels/ in the image path
+        for split, entries in split_entries.items():
+            with open(os.path.join(dest_root, f'{split}.txt'), 'w') as f:
+                f.writelines(os.path.abspath(entry.path) + '\n' for entry in entries)
+        return
+
+    # data.yaml points at the split folders now; list files from an earlier 'list' run are stale
+    for split in splits:
+        list_path = os.path.join(dest_root, f'{split}.txt')
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+    wanted = set()
+    for split, entries in split_entries.items():
+        for entry in entries:
+            for src, kind in ((entry.path, 'images'), (entry.label_path, 'labels')):
+                dst_dir = os.path.join(dest_root, split, entry.person, kind)
+                os.makedirs(dst_dir, exist_ok=True)
+                dst = os.path.join(dst_dir, os.path.basename(src))
+                wanted.add(os.path.abspath(dst))
+                place(src, dst)
+
+    # Remove images/labels whose source was deleted since the last run
+    for split in splits:
+        for root, _, files in os.walk(os.path.join(dest_root, split)):
+            for name in files:
+                path = os.path.abspath(os.path.join(root, name))
+                if path not in wanted:
+                    os.remove(path)
 
 # === MAIN RUN ===
+os.makedirs(dest_root, exist_ok=True)
+assignments = load_assignments()
+split_entries = {split: [] for split in splits}
 for person in persons:
-    split_and_copy(person)
+    pairs = collect_pairs(person)
+    added = assign_person(pairs, assignments)
+    print(f"[{person}] Total pairs: {len(pairs)} ({added} newly assigned)")
+    for entry in pairs:
+        split_entries[assignments[relative(entry)]].append(entry)
+
+# Forget images that no longer exist
+current = {relative(entry) for entries in split_entries.values() for entry in entries}
+assignments = {rel: split for rel, split in assignments.items() if rel in current}
+with open(assignments_path, 'w', encoding='utf-8') as f:
+    json.dump({"seed": seed, "split_ratio": list(split_ratio), "assignments": assignments}, f, indent=1)
+
+for split, entries in split_entries.items():
+    print(f"  → {split}: {len(entries)} items")
+materialize(split_entries)
 
 # === WRITE YAML FILE WITH INLINE NAMES LIST ===
 yaml_path = os.path.join(dest_root, 'data.yaml')
 class_names = list(persons)
 
 yaml_dict = {
-    'train': os.path.join(dest_root, 'train'),
-    'val': os.path.join(dest_root, 'validation'),
-    'test': os.path.join(dest_root, 'test'),
+    'train': os.path.join(dest_root, 'train.txt' if split_mode == 'list' else 'train'),
+    'val': os.path.join(dest_root, 'validation.txt' if split_mode == 'list' else 'validation'),
+    'test': os.path.join(dest_root, 'test.txt' if split_mode == 'list' else 'test'),
     'nc': len(class_names),
     'names': class_names
 }
@@ -0,0 +1,183 @@
+import cv2
+import numpy as np
+
+from detection import iou_matrix
+
+
+def box_to_z(box):
+    """xyxy -> [cx, cy, area, aspect]"""
+    w, h = box[2] - box[0], box[3] - box[1]
+    return np.array([box[0] + w / 2, box[1] + h / 2, w * h, w / max(h, 1e-6)], dtype=np.float64)
+
+
+def x_to_box(x):
+    """Kalman state -> xyxy"""
+    area, aspect = max(x[2], 1e-6), max(x[3], 1e-6)
+    w = np.sqrt(area * aspect)
+    h = area / w
+    return np.array([x[0] - w / 2, x[1] - h / 2, x[0] + w / 2, x[1] + h / 2], dtype=np.float32)
+
+
+class KalmanBox:
+    """Constant-velocity Kalman filter over [cx, cy, area, aspect] (the SORT model)."""
+
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1
+    H = np.eye(4, 7)
+    R = np.diag([1.0, 1.0, 10.0, 10.0])
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 1e-4])
+
+    def __init__(self, box):
+        self.x = np.zeros(7)
+        self.x[:4] = box_to_z(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return x_to_box(self.x)
+
+    def update(self, box):
+        y = box_to_z(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+    @property
+    def box(self):
+        return x_to_box(self.x)
+
+
+class Track:
+    def __init__(self, track_id, detection, name):
+        self.id = track_id
+        self.kf = KalmanBox(detection[:4])
+        self.hits = 1
+        self.misses = 0
+        self.votes = {}
+        self.num_votes = 0
+        self.identity = None      # decided once per track, then fixed
+        if name is not None:
+            self.vote(name, float(detection[4]))
+
+    def vote(self, name, conf):
+        self.votes[name] = self.votes.get(name, 0.0) + conf
+        self.num_votes += 1
+
+    @property
+    def leading(self):
+        """(name, share of total vote weight) of the current front-runner; (None, 0.0) before any vote."""
+        if not self.votes:
+            return None, 0.0
+        total = sum(self.votes.values())
+        name = max(self.votes, key=self.votes.get)
+        return name, self.votes[name] / total if total else 0.0
+
+    def snapshot(self):
+        name, share = self.leading
+        return {"id": self.id, "box": self.kf.box, "name": self.identity or name or "face",
+                "share": share, "confirmed": self.identity is not None}
+
+
+class Tracker:
+    """SORT-style tracker: Kalman prediction + greedy IoU association, with a
+    confidence-weighted identity vote per track.
+
+    update() is called on frames where the detector ran, predict() on the
+    frames in between so boxes keep moving without a model call.
+
+    With class_votes=False the detector's class is ignored and identity votes
+    come from outside through add_vote() (e.g. gallery embedding matches).
+    """
+
+    def __init__(self, names, iou_threshold=0.3, max_misses=3, min_votes=3, min_share=0.6, class_votes=True):
+        self.names = names
+        self.class_votes = class_votes
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.min_votes = min_votes
+        self.min_share = min_share
+        self.tracks = []
+        self._next_id = 1
+
+    def predict(self):
+        for track in self.tracks:
+            track.kf.predict()
+        return [track.snapshot() for track in self.tracks]
+
+    def _associate(self, predicted, detections):
+        if len(predicted) == 0 or len(detections) == 0:
+            return []
+        overlaps = iou_matrix(predicted, detections)
+        pairs = []
+        for flat in np.argsort(-overlaps, axis=None):
+            t, d = np.unravel_index(flat, overlaps.shape)
+            if overlaps[t, d] < self.iou_threshold:
+                break
+            if all(t != pt and d != pd for pt, pd in pairs):
+                pairs.append((t, d))
+        return pairs
+
+    def update(self, detections):
+        """Feed one round of (N, 6) detections. Returns (snapshots, newly_confirmed),
+        where newly_confirmed lists (track_id, name) for tracks that just reached a decision."""
+        predicted = np.array([track.kf.predict() for track in self.tracks]).reshape(-1, 4)
+        pairs = self._associate(predicted, detections)
+        matched_tracks = {t for t, _ in pairs}
+        matched_dets = {d for _, d in pairs}
+
+        for t, d in pairs:
+            track, det = self.tracks[t], detections[d]
+            track.kf.update(det[:4])
+            track.hits += 1
+            track.misses = 0
+            if self.class_votes:
+                track.vote(self.names[int(det[5])], float(det[4]))
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for d, det in enumerate(detections):
+            if d not in matched_dets:
+                name = self.names[int(det[5])] if self.class_votes else None
+                self.tracks.append(Track(self._next_id, det, name))
+                self._next_id += 1
+
+        newly_confirmed = []
+        if self.class_votes:
+            for track in self.tracks:
+                if track.identity is None and track.hits >= self.min_votes and self._decide(track):
+                    newly_confirmed.append((track.id, track.identity))
+
+        return [track.snapshot() for track in self.tracks], newly_confirmed
+
+    def _decide(self, track):
+        name, share = track.leading
+        if name is not None and share >= self.min_share:
+            track.identity = name
+        return track.identity is not None
+
+    def add_vote(self, track_id, name, weight):
+        """External identity vote. Returns (track_id, name) if this vote decided the track, else None."""
+        track = next((t for t in self.tracks if t.id == track_id), None)
+        if track is None or track.identity is not None:
+            return None
+        track.vote(name, weight)
+        if track.num_votes >= self.min_votes and self._decide(track):
+            return track.id, track.identity
+        return None
+
+
+def draw_tracks(frame, tracks):
+    """Overlay used by infer23.py: green once a track's identity is decided, orange while voting."""
+    for track in tracks:
+        x1, y1, x2, y2 = (int(v) for v in track["box"])
+        color = (0, 255, 0) if track["confirmed"] else (0, 200, 255)
+        label = f"#{track['id']} {track['name']} {track['share']:.2f}"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
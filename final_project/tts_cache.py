@@ -0,0 +1,116 @@
+import hashlib
+import io
+import os
+import sys
+import threading
+from collections import deque
+
+
+def wav_player():
+    """Function that plays WAV bytes from memory (blocking), or None when no player is available.
+    Checked once up front so hosts without one never render phrases they can't play."""
+    if sys.platform == 'win32':
+        import winsound
+        return lambda data: winsound.PlaySound(data, winsound.SND_MEMORY)
+    try:
+        import simpleaudio
+        import wave
+    except ImportError:
+        return None
+
+    def play(data):
+        with wave.open(io.BytesIO(data)) as wav:
+            simpleaudio.WaveObject.from_wave_read(wav).play().wait_done()
+    return play
+
+
+class PhraseCache:
+    """WAV renders of known phrases, keyed by text + voice + rate, kept on disk and in memory."""
+
+    def __init__(self, engine, cache_dir='tts_cache'):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self._audio = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text):
+        voice = self.engine.getProperty('voice')
+        rate = self.engine.getProperty('rate')
+        return hashlib.sha1(f"{voice}|{rate}|{text}".encode('utf-8')).hexdigest()
+
+    def get(self, text):
+        key = self.key(text)
+        if key not in self._audio:
+            path = os.path.join(self.cache_dir, key + '.wav')
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            with open(path, 'rb') as f:
+                self._audio[key] = f.read()
+        return self._audio[key]
+
+    def render(self, text):
+        """Synthesize text once into the cache; must run on the engine's thread."""
+        path = os.path.join(self.cache_dir, self.key(text) + '.wav')
+        self.engine.save_to_file(text, path)
+        self.engine.runAndWait()
+        return self.get(text)
+
+
+class SpeechQueue:
+    """Background speaker: cached phrases play straight from memory, unseen text goes
+    to pyttsx3, and a phrase already waiting in the queue is not queued again.
+    Without a WAV player everything is spoken by pyttsx3 directly and nothing is cached."""
+
+    def __init__(self, engine, cache_dir='tts_cache', preload=()):
+        self.engine = engine
+        self.play = wav_player()
+        self.cache = PhraseCache(engine, cache_dir) if self.play is not None else None
+        self._preload = list(preload) if self.cache is not None else []
+        self._pending = deque()
+        self._pending_texts = set()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, text, cache=True):
+        with self._cond:
+            if text in self._pending_texts:
+                self.dropped += 1
+                return
+            self._pending_texts.add(text)
+            self._pending.append((text, cache))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _speak(self, text, cache):
+        if cache and self.cache is not None:
+            audio = self.cache.get(text)
+            if audio is None:
+                audio = self.cache.render(text)
+            if audio is not None:
+                self.play(audio)
+                return
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def _run(self):
+        # pyttsx3 engines are not thread-safe, so rendering happens on this thread too
+        for text in self._preload:
+            if self.cache.get(text) is None:
+                self.cache.render(text)
+
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopped)
+                if self._stopped:
+                    return
+                text, cache = self._pending.popleft()
+                self._pending_texts.discard(text)
+            self._speak(text, cache)
@@ -1,6 +1,7 @@
 import cv2
 import matplotlib.pyplot as plt
 import os
+from dataset_index import load_index
 
 def draw_yolo_bbox(image_path, label_path):
     # Load the image
@@ -46,4 +47,11 @@ def draw_yolo_bbox(image_path, label_path):
     plt.axis('off')
     plt.title(os.path.basename(image_path))
     plt.show()
+
+def draw_dataset(root, person=None, limit=None):
+    """Show labeled images of a dataset, taken from its manifest instead of re-walking the tree."""
+    entries = load_index(root).entries(person, labeled=True)
+    for entry in entries[:limit]:
+        draw_yolo_bbox(entry.path, entry.label_path)
+
 draw_yolo_bbox(r"C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\dataset_face\Hung\images\20250514_013116(0).jpg", r"C:\Users\Admin\PycharmProjects\YOLOV7\IoT_project\dataset_face\Hung\labels\20250514_013116(0).txt")
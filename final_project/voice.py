@@ -0,0 +1,202 @@
+import queue
+import re
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2            # int16 mono
+CHUNK_MS = 30
+
+# Fixed commands, checked in this order (same precedence as the old if/elif chain)
+COMMANDS = (("time", "time"), ("hello", "hello"), ("stop", "stop listening"))
+COMMAND_PATTERN = re.compile("|".join(f"(?P<{name}>{re.escape(phrase)})" for name, phrase in COMMANDS))
+
+
+def match_command(text):
+    """Command name for recognized text ("time", "hello", "stop"), or None."""
+    found = {m.lastgroup for m in COMMAND_PATTERN.finditer(text.lower())}
+    return next((name for name, _ in COMMANDS if name in found), None)
+
+
+# --- Audio sources: iterables of raw int16 chunks ---
+def microphone_chunks(stop_event, sample_rate=SAMPLE_RATE, chunk_ms=CHUNK_MS):
+    """One microphone stream kept open for the listener's whole lifetime."""
+    import speech_recognition as sr
+    chunk = sample_rate * chunk_ms // 1000
+    with sr.Microphone(sample_rate=sample_rate, chunk_size=chunk) as source:
+        while not stop_event.is_set():
+            yield source.stream.read(chunk)
+
+
+def wav_chunks(path, chunk_ms=CHUNK_MS, realtime=False):
+    """Replay a 16-bit mono WAV file as if it came from the microphone."""
+    with wave.open(path, 'rb') as wav:
+        chunk = wav.getframerate() * chunk_ms // 1000
+        while True:
+            data = wav.readframes(chunk)
+            if not data:
+                return
+            if realtime:
+                time.sleep(chunk_ms / 1000)
+            yield data
+
+
+# --- Voice activity detection ---
+class EnergyVAD:
+    """Energy gate with an adaptive noise floor. feed() takes one chunk and returns a
+    finished speech segment (bytes, including a short pre-roll) or None."""
+
+    def __init__(self, chunk_ms=CHUNK_MS, ratio=3.0, min_energy=300.0, start_ms=90, hangover_ms=600,
+                 min_speech_ms=250, max_speech_ms=8000, preroll_ms=300):
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.start_chunks = max(start_ms // chunk_ms, 1)
+        self.hangover_chunks = max(hangover_ms // chunk_ms, 1)
+        self.min_chunks = max(min_speech_ms // chunk_ms, 1)
+        self.max_chunks = max(max_speech_ms // chunk_ms, 1)
+        self.ring = deque(maxlen=max(preroll_ms // chunk_ms, self.start_chunks))
+        self.noise_floor = min_energy / ratio
+        self.segment = None
+        self.voiced_run = 0
+        self.silent_run = 0
+
+    def is_voiced(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        voiced = rms > max(self.min_energy, self.noise_floor * self.ratio)
+        if not voiced and self.segment is None:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return voiced
+
+    def feed(self, chunk):
+        voiced = self.is_voiced(chunk)
+
+        if self.segment is None:
+            self.ring.append(chunk)
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= self.start_chunks:
+                self.segment = list(self.ring)
+                self.ring.clear()
+                self.silent_run = 0
+            return None
+
+        self.segment.append(chunk)
+        self.silent_run = 0 if voiced else self.silent_run + 1
+        if self.silent_run < self.hangover_chunks and len(self.segment) < self.max_chunks:
+            return None
+
+        segment, self.segment = self.segment, None
+        self.voiced_run = 0
+        if len(segment) - self.silent_run < self.min_chunks:
+            return None
+        return b"".join(segment)
+
+
+# --- Recognizers: callable(audio_bytes) -> text ("" when nothing was understood) ---
+class GoogleRecognizer:
+    def __init__(self, language='en-US', sample_rate=SAMPLE_RATE):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.language = language
+        self.sample_rate = sample_rate
+
+    def __call__(self, audio):
+        try:
+            data = self.sr.AudioData(audio, self.sample_rate, SAMPLE_WIDTH)
+            return self.recognizer.recognize_google(data, language=self.language)
+        except (self.sr.UnknownValueError, self.sr.RequestError):
+            return ""
+
+
+class SphinxRecognizer(GoogleRecognizer):
+    """Offline keyword spotting (pocketsphinx) restricted to the fixed commands."""
+
+    def __call__(self, audio):
+        try:
+            data = self.sr.AudioData(audio, self.sample_rate, SAMPLE_WIDTH)
+            keywords = [(phrase, 1e-20) for _, phrase in COMMANDS]
+            return self.recognizer.recognize_sphinx(data, keyword_entries=keywords)
+        except (self.sr.UnknownValueError, self.sr.RequestError):
+            return ""
+
+
+class ScriptedRecognizer:
+    """Local stand-in for tests and replays: returns the given transcripts in order."""
+
+    def __init__(self, transcripts):
+        self.transcripts = deque(transcripts)
+        self.calls = 0
+
+    def __call__(self, audio):
+        self.calls += 1
+        return self.transcripts.popleft() if self.transcripts else ""
+
+
+def make_recognizer(name='google', language='en-US'):
+    if name == 'sphinx':
+        return SphinxRecognizer(language)
+    return GoogleRecognizer(language)
+
+
+# --- Listener ---
+class VoiceListener:
+    """Keeps one audio stream open, gates it with the VAD and only sends speech
+    segments to the recognizer. on_command(command, text) is called with the matched
+    command name (or None for unrecognized speech); returning False stops listening."""
+
+    def __init__(self, recognizer, on_command, source=None, vad=None, max_pending=4):
+        self.recognizer = recognizer
+        self.on_command = on_command
+        self.stop_event = threading.Event()
+        self.source = source if source is not None else microphone_chunks(self.stop_event)
+        self.vad = vad or EnergyVAD()
+        self.segments = queue.Queue(maxsize=max_pending)
+        self.recognizer_calls = 0
+        self.dropped = 0
+        self._threads = []
+
+    def start(self):
+        print("Listening for commands...")
+        for target in (self._capture_loop, self._recognize_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _capture_loop(self):
+        for chunk in self.source:
+            if self.stop_event.is_set():
+                break
+            segment = self.vad.feed(chunk)
+            if segment is None:
+                continue
+            try:
+                self.segments.put_nowait(segment)
+            except queue.Full:
+                self.dropped += 1
+        self.segments.put(None)
+
+    def _recognize_loop(self):
+        while not self.stop_event.is_set():
+            segment = self.segments.get()
+            if segment is None:
+                break
+            self.recognizer_calls += 1
+            text = self.recognizer(segment)
+            if not text:
+                continue
+            print("You said:", text)
+            if self.on_command(match_command(text), text.lower()) is False:
+                self.stop()
@@ -168,6 +168,38 @@ export const recognizePerson = async (req, res) => {
     }
 };
 
+// Nhận diện một burst nhiều frame từ camera cửa trong một lần gọi
+export const recognizeBurst = async (req, res) => {
+    try {
+        const imageBuffers = (req.files || []).map((file) => file.buffer);
+
+        if (imageBuffers.length === 0) {
+            return res.status(400).json({ success: false, message: 'At least one image is required for recognition.' });
+        }
+
+        const result = await cameraService.recognizeBurst(imageBuffers);
+
+        if (result.recognized) {
+            const person = await Person.findOne({ name: result.name });
+            if (person) {
+                person.lastSeen = new Date();
+                await person.save();
+            }
+        }
+
+        res.json({
+            success: true,
+            recognition: result
+        });
+    } catch (error) {
+        res.status(500).json({
+            success: false,
+            message: 'Burst recognition failed',
+            error: error.message
+        });
+    }
+};
+
 export const getRegisteredPersons = async (req, res) => {
     try {
         const persons = await Person.find({ registered: true });
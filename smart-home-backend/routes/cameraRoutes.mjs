@@ -8,6 +8,7 @@ import {
     captureFromCamera,
     getLiveFrame,
     recognizePerson,
+    recognizeBurst,
     getRegisteredPersons,
     startLiveStream
 } from '../controllers/cameraController.mjs';
@@ -28,6 +29,7 @@ router.get('/persons', getRegisteredPersons);
 
 // Face recognition
 router.post('/recognize', upload.single('image'), recognizePerson);
+router.post('/recognize-burst', upload.array('images', 20), recognizeBurst);
 // Live stream and capture
 router.get('/frame', getLiveFrame);           // NEW: Get live frame
 router.post('/capture', captureFromCamera);   // NEW: Capture from camera
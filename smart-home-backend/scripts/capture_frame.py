@@ -3,8 +3,20 @@ import sys
 import cv2
 import json
 import os
+from frame_grabber import fetch_jpeg
 
 def capture_frame(rtsp_url, output_path):
+    # Ưu tiên lấy frame mới nhất từ frame_grabber.py (stream đã mở sẵn, không phải bắt tay RTSP lại)
+    try:
+        data = fetch_jpeg(rtsp_url)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return {"success": True, "message": "Frame captured successfully"}
+    except OSError:
+        pass  # Grabber không chạy hoặc chưa có frame -> mở stream trực tiếp
+    return capture_frame_direct(rtsp_url, output_path)
+
+def capture_frame_direct(rtsp_url, output_path):
     try:
         os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp"
         
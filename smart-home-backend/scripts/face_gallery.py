@@ -0,0 +1,319 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from face_index import MODEL_NAME, DETECTOR_BACKEND, EMBEDDING_DIM, IMAGE_EXTENSIONS, FaceIndex, represent
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+GALLERY_FILE = 'gallery.bin'
+META_FILE = 'gallery.json'
+LOCK_FILE = 'gallery.lock'
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on path shared by every process (worker, one-shot scripts, infer23)."""
+    with open(path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FaceGallery:
+    """Embeddings computed once at registration and kept on disk.
+
+    gallery.bin is a raw float32 matrix (one row per image, appended in place
+    and read back through np.memmap); gallery.json holds one metadata entry per
+    row: person, source image (relative to db_path), sha1, size, mtime, timestamp.
+
+    Several processes write the same gallery, so every change holds gallery.lock
+    and starts by re-reading the sidecar and the row count of gallery.bin.
+    """
+
+    def __init__(self, db_path, dim=EMBEDDING_DIM):
+        self.db_path = db_path
+        self.dim = dim
+        self.bin_path = os.path.join(db_path, GALLERY_FILE)
+        self.meta_path = os.path.join(db_path, META_FILE)
+        self.lock_path = os.path.join(db_path, LOCK_FILE)
+        self.entries = []
+        self.meta_stamp = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the gallery lock (threads and processes) with self.entries freshly loaded."""
+        os.makedirs(self.db_path, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            self._load_meta()
+            yield
+
+    def reload(self):
+        with self._locked():
+            pass
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed_on_disk(self):
+        """True if another process rewrote the sidecar since this instance last read or wrote it."""
+        return self._stamp() != self.meta_stamp
+
+    def _load_meta(self):
+        # Called with the gallery locked
+        self.entries = []
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        if meta.get('model') == MODEL_NAME and meta.get('detector') == DETECTOR_BACKEND and meta.get('dim') == self.dim:
+            self.entries = meta.get('entries', [])
+        # else: no gallery yet, or built with another model: start over
+        rows = os.path.getsize(self.bin_path) // (4 * self.dim) if os.path.exists(self.bin_path) else 0
+        # Extra rows come from an append interrupted before the sidecar was written
+        # (or from another model's gallery); drop them so rows and entries stay aligned
+        self.entries = self.entries[:rows]
+        if rows > len(self.entries):
+            with open(self.bin_path, 'r+b') as f:
+                f.truncate(len(self.entries) * 4 * self.dim)
+        self.meta_stamp = self._stamp()
+
+    def _save_meta(self):
+        meta = {"model": MODEL_NAME, "detector": DETECTOR_BACKEND, "dim": self.dim, "entries": self.entries}
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self.meta_stamp = self._stamp()
+
+    def vectors(self):
+        """All gallery embeddings as a read-only memory map, shaped (len(self), dim)."""
+        if not self.entries:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.bin_path, dtype=np.float32, mode='r', shape=(len(self.entries), self.dim))
+
+    def labels(self):
+        return [entry['person'] for entry in self.entries]
+
+    def sources(self):
+        return [entry['source'] for entry in self.entries]
+
+    def snapshot(self):
+        """(vectors, labels, sources) of the current on-disk gallery, read under the lock
+        so a concurrent rewrite cannot pair one person's name with another's vector."""
+        with self._locked():
+            return np.array(self.vectors()), self.labels(), self.sources()
+
+    def _entry(self, person, image_path, sha1=None):
+        stat = os.stat(image_path)
+        return {
+            "person": person,
+            "source": os.path.relpath(image_path, self.db_path).replace(os.sep, '/'),
+            "sha1": sha1 or file_sha1(image_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "timestamp": datetime.now().isoformat(timespec='seconds')
+        }
+
+    def _append(self, entries, vectors):
+        # Called with the gallery locked; sources another process stored meanwhile are skipped
+        known = set(self.sources())
+        keep = [i for i, entry in enumerate(entries) if entry['source'] not in known]
+        if not keep:
+            return []
+        vectors = np.ascontiguousarray(np.atleast_2d(vectors)[keep], dtype=np.float32)
+        with open(self.bin_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        added = [entries[i] for i in keep]
+        self.entries.extend(added)
+        self._save_meta()
+        return added
+
+    def append(self, entries, vectors):
+        """Append rows; returns the entries actually stored."""
+        with self._locked():
+            return self._append(entries, vectors)
+
+    def add(self, person, image_path, embedding):
+        """Store the embedding of one registered image. Returns the metadata entry,
+        or None if the image is already in the gallery."""
+        added = self.append([self._entry(person, image_path)], embedding)
+        return added[0] if added else None
+
+    def find_hash(self, person, sha1):
+        for row, entry in enumerate(self.entries):
+            if entry['person'] == person and entry['sha1'] == sha1:
+                return row
+        return None
+
+    def _rewrite(self, keep_rows):
+        vectors = np.array(self.vectors()[keep_rows], dtype=np.float32)
+        self.entries = [self.entries[row] for row in keep_rows]
+        tmp_path = self.bin_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(vectors.tobytes())
+        os.replace(tmp_path, self.bin_path)
+        self._save_meta()
+
+    def sync(self):
+        """Bring the gallery in line with the images under db_path.
+
+        Unchanged files (same size and mtime) are not even hashed; changed or new
+        files are hashed, and only content never seen before for that person is
+        embedded. Rows whose source file disappeared or changed are dropped.
+        Returns the number of images embedded.
+
+        The whole sync holds the lock: a second process arriving meanwhile (e.g. a
+        fallback script during the worker's first sync) waits and then finds the
+        images already embedded instead of embedding and appending them again.
+        """
+        with self._locked():
+            return self._sync()
+
+    def _sync(self):
+        by_source = {entry['source']: row for row, entry in enumerate(self.entries)}
+        keep_rows, new_entries, new_vectors = [], [], []
+        embedded = 0
+
+        for person in sorted(os.listdir(self.db_path)):
+            person_dir = os.path.join(self.db_path, person)
+            if not os.path.isdir(person_dir):
+                continue
+            for file_name in sorted(os.listdir(person_dir)):
+                if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                image_path = os.path.join(person_dir, file_name)
+                source = f"{person}/{file_name}"
+                stat = os.stat(image_path)
+                row = by_source.get(source)
+                if row is not None:
+                    entry = self.entries[row]
+                    if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                        keep_rows.append(row)
+                        continue
+
+                sha1 = file_sha1(image_path)
+                known_row = self.find_hash(person, sha1)
+                if known_row is not None:
+                    vector = np.array(self.vectors()[known_row])
+                else:
+                    faces = represent(image_path)
+                    if not faces:
+                        continue
+                    vector = np.asarray(faces[0]['embedding'], dtype=np.float32)
+                    embedded += 1
+                new_entries.append(self._entry(person, image_path, sha1))
+                new_vectors.append(vector)
+
+        if len(keep_rows) != len(self.entries):
+            self._rewrite(keep_rows)
+        if new_vectors:
+            self._append(new_entries, np.stack(new_vectors))
+        return embedded
+
+
+# === SHARED INSTANCES ===
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def folder_signature(db_path):
+    """Person folders with their mtimes: changes when a person folder is added or removed,
+    or an image is added to / removed from one. Cheap enough to check on every lookup."""
+    if not os.path.isdir(db_path):
+        return ()
+    return tuple(sorted((entry.name, entry.stat().st_mtime_ns)
+                        for entry in os.scandir(db_path) if entry.is_dir()))
+
+
+def build_index(gallery):
+    """FaceIndex over a consistent snapshot of the gallery (no embedding)."""
+    vectors, labels, sources = gallery.snapshot()
+    index = FaceIndex(capacity=max(len(labels), 64))
+    if labels:
+        index.add(vectors, labels, sources)
+    return index
+
+
+def _load_shared(db_path):
+    key = os.path.abspath(db_path)
+    with _shared_lock:
+        shared = _shared.get(key)
+        signature = folder_signature(db_path)
+        if shared is None or shared[2] != signature:
+            # First use, or images were added/removed under faces_db (bulk import, deleted
+            # person): re-sync, so a removed person stops being recognized right away
+            gallery = shared[0] if shared else FaceGallery(db_path)
+            gallery.sync()
+            shared = _shared[key] = [gallery, build_index(gallery), signature]
+        elif shared[0].changed_on_disk():
+            # Another process (one-shot script, infer23's gallery sync) added or dropped rows
+            shared[1] = build_index(shared[0])
+        return shared
+
+
+def get_index(db_path):
+    """In-memory FaceIndex for db_path. The folder is re-synced whenever its person
+    folders change, and the index is rebuilt whenever another process changes the
+    on-disk gallery."""
+    return _load_shared(db_path)[1]
+
+
+def get_gallery(db_path):
+    return _load_shared(db_path)[0]
+
+
+def register_embedding(db_path, person, image_path, embedding):
+    """Append a freshly computed embedding to the gallery (and to the in-memory
+    index if this process already has one). No other image is re-embedded."""
+    with _shared_lock:
+        shared = _shared.get(os.path.abspath(db_path))
+    gallery = shared[0] if shared else FaceGallery(db_path)
+
+    entry = gallery.add(person, image_path, embedding)
+    if entry and shared:
+        with _shared_lock:
+            # Rebuilt rather than appended to: the add may also have picked up other processes' rows
+            shared[1] = build_index(gallery)
+    return entry
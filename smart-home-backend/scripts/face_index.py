@@ -0,0 +1,197 @@
+import threading
+
+import numpy as np
+
+MODEL_NAME = 'Facenet512'
+DETECTOR_BACKEND = 'ssd'
+EMBEDDING_DIM = 512
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Same thresholds DeepFace.find uses for Facenet512
+THRESHOLDS = {'cosine': 0.30, 'euclidean_l2': 1.04}
+
+# DeepFace caches one SSD net and one Facenet512 model per process; cv2.dnn's
+# setInput/forward are not thread-safe, so every model call goes through this lock.
+_model_lock = threading.Lock()
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-10)
+
+
+class FaceIndex:
+    """In-memory gallery: one contiguous float32 matrix of L2-normalized
+    embeddings plus parallel label/source arrays. A query is one matmul."""
+
+    def __init__(self, dim=EMBEDDING_DIM, capacity=64):
+        self.dim = dim
+        self._vectors = np.empty((capacity, dim), dtype=np.float32)
+        self._labels = np.empty(capacity, dtype=object)
+        self._sources = np.empty(capacity, dtype=object)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    @property
+    def labels(self):
+        return self._labels[:self._size]
+
+    @property
+    def sources(self):
+        return self._sources[:self._size]
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        labels = np.empty(capacity, dtype=object)
+        sources = np.empty(capacity, dtype=object)
+        vectors[:self._size] = self.vectors
+        labels[:self._size] = self.labels
+        sources[:self._size] = self.sources
+        self._vectors, self._labels, self._sources = vectors, labels, sources
+
+    def add(self, vectors, labels, sources=None):
+        vectors = normalize(np.atleast_2d(vectors))
+        if sources is None:
+            sources = [''] * len(vectors)
+        with self._lock:
+            self._reserve(len(vectors))
+            end = self._size + len(vectors)
+            self._vectors[self._size:end] = vectors
+            self._labels[self._size:end] = list(labels)
+            self._sources[self._size:end] = list(sources)
+            self._size = end
+
+    def remove_label(self, label):
+        with self._lock:
+            keep = self.labels != label
+            kept = int(keep.sum())
+            self._vectors[:kept] = self.vectors[keep]
+            self._labels[:kept] = self.labels[keep]
+            self._sources[:kept] = self.sources[keep]
+            self._size = kept
+
+    def search(self, queries, k=1, metric='cosine'):
+        """Return (distances, indices), both shaped (n_queries, k), best first."""
+        queries = normalize(np.atleast_2d(queries))
+        with self._lock:
+            gallery = self.vectors
+        k = min(k, len(gallery))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+
+        similarity = queries @ gallery.T
+        if k < len(gallery):
+            top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(len(gallery)), (len(queries), 1))
+        top_sim = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_sim, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_sim = np.take_along_axis(top_sim, order, axis=1)
+
+        if metric == 'euclidean_l2':
+            distances = np.sqrt(np.maximum(2.0 - 2.0 * top_sim, 0.0))
+        else:
+            distances = 1.0 - top_sim
+        return distances, top
+
+    def query(self, embedding, k=1, threshold=None, metric='cosine'):
+        """Best matches for one embedding, filtered by the distance threshold."""
+        if threshold is None:
+            threshold = THRESHOLDS[metric]
+        distances, indices = self.search(embedding, k=k, metric=metric)
+        matches = []
+        for distance, idx in zip(distances[0], indices[0]):
+            if distance > threshold:
+                break
+            matches.append({
+                "name": self._labels[idx],
+                "source": self._sources[idx],
+                "distance": float(distance)
+            })
+        return matches
+
+
+# === EMBEDDING ===
+def represent(img):
+    """Facenet512 embeddings for every face DeepFace finds in img (path or array)."""
+    from deepface import DeepFace
+    with _model_lock:
+        return DeepFace.represent(
+            img_path=img,
+            model_name=MODEL_NAME,
+            detector_backend=DETECTOR_BACKEND,
+            enforce_detection=False
+        )
+
+
+def detect_faces(img):
+    """SSD face crops for img (path or BGR array), aligned, as RGB floats in [0, 1]."""
+    from deepface import DeepFace
+    with _model_lock:
+        return DeepFace.extract_faces(
+            img_path=img,
+            detector_backend=DETECTOR_BACKEND,
+            enforce_detection=False,
+            align=True
+        )
+
+
+def embed_faces(faces):
+    """Facenet512 embeddings for many face crops in one batched forward pass.
+
+    Preprocessing mirrors DeepFace.represent (RGB->BGR, resize with padding,
+    'base' normalization) so the vectors match the ones stored in the gallery.
+    This relies on DeepFace internals; if they are missing (another DeepFace
+    version), each face goes through the public DeepFace.represent instead.
+    """
+    if len(faces) == 0:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+    from deepface import DeepFace
+    try:
+        from deepface.modules import preprocessing
+        model = DeepFace.build_model(MODEL_NAME)
+        target_size = model.input_shape
+        forward = model.model
+        resize, normalize_input = preprocessing.resize_image, preprocessing.normalize_input
+    except (ImportError, AttributeError):
+        return _embed_faces_one_by_one(faces)
+
+    batch = np.concatenate([
+        normalize_input(
+            img=resize(img=face[:, :, ::-1], target_size=(target_size[1], target_size[0])),
+            normalization='base'
+        )
+        for face in faces
+    ])
+    with _model_lock:
+        return np.asarray(forward(batch, training=False), dtype=np.float32)
+
+
+def _embed_faces_one_by_one(faces):
+    """Fallback for embed_faces through DeepFace's public API (detection skipped: the crops are faces)."""
+    from deepface import DeepFace
+    vectors = []
+    for face in faces:
+        bgr = (np.clip(face[:, :, ::-1], 0, 1) * 255).astype(np.uint8)
+        with _model_lock:
+            result = DeepFace.represent(img_path=bgr, model_name=MODEL_NAME, detector_backend='skip',
+                                        enforce_detection=False)
+        vectors.append(result[0]['embedding'])
+    return np.asarray(vectors, dtype=np.float32)
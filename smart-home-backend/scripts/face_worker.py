@@ -0,0 +1,105 @@
+import os
+import sys
+
+# === BẮT ĐẦU KHỐI LỆNH ẨN CẢNH BÁO ===
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import warnings
+import logging
+
+warnings.filterwarnings('ignore')
+logging.getLogger('tensorflow').setLevel(logging.FATAL)
+# === KẾT THÚC KHỐI LỆNH ẨN CẢNH BÁO ===
+
+import argparse
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# stdout is the job channel: keep a handle to it and send everything else
+# (DeepFace prints, progress bars) to stderr so it cannot corrupt the protocol.
+_channel = sys.stdout
+sys.stdout = sys.stderr
+_channel_lock = threading.Lock()
+
+import numpy as np
+from deepface import DeepFace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from recognize_face import recognize_from_file, recognize_batch
+from register_face import register_face
+from face_index import MODEL_NAME, DETECTOR_BACKEND
+from face_gallery import get_index
+
+
+def send(message):
+    with _channel_lock:
+        _channel.write(json.dumps(message) + '\n')
+        _channel.flush()
+
+
+def warm_up(db_path):
+    """Load Facenet512, the SSD detector and the gallery index once, before the first job arrives."""
+    DeepFace.build_model(MODEL_NAME)
+    blank = np.zeros((160, 160, 3), dtype=np.uint8)
+    DeepFace.extract_faces(img_path=blank, detector_backend=DETECTOR_BACKEND, enforce_detection=False)
+    get_index(db_path)
+
+
+def handle_job(job, db_path):
+    cmd = job.get('cmd')
+    if cmd == 'recognize':
+        return recognize_from_file(job['image_path'], job.get('db_path', db_path))
+    if cmd == 'recognize_batch':
+        return recognize_batch(job['image_paths'], job.get('db_path', db_path))
+    if cmd == 'register':
+        return register_face(job['name'], job['image_path'])
+    if cmd == 'ping':
+        return {"success": True, "message": "pong"}
+    return {"success": False, "message": f"Unknown command: {cmd}"}
+
+
+def run_job(job, db_path):
+    try:
+        result = handle_job(job, db_path)
+    except Exception as e:
+        result = {"success": False, "message": f"Worker error: {str(e)}"}
+    send({"id": job.get('id'), "result": result})
+
+
+def serve(db_path, workers):
+    try:
+        warm_up(db_path)
+    except Exception as e:
+        send({"event": "error", "message": f"Model loading failed: {str(e)}"})
+        return 1
+
+    send({"event": "ready", "pid": os.getpid(), "workers": workers})
+
+    # Model calls are serialized inside face_index (the cached SSD net is not thread-safe);
+    # the threads still overlap decoding, file I/O and gallery matching.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError:
+                send({"id": None, "result": {"success": False, "message": "Invalid job: not JSON"}})
+                continue
+            if job.get('cmd') == 'shutdown':
+                break
+            pool.submit(run_job, job, db_path)
+
+    send({"event": "stopped"})
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Long-lived face recognition worker (JSON lines over stdin/stdout).')
+    parser.add_argument('--db', default='./faces_db', help='Face database folder.')
+    parser.add_argument('--workers', type=int, default=2, help='Number of jobs handled at once.')
+    args = parser.parse_args()
+    sys.exit(serve(args.db, args.workers))
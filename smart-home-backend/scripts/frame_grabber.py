@@ -0,0 +1,219 @@
+# smart-home-backend\scripts\frame_grabber.py
+import os
+import json
+import time
+import threading
+import argparse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+from urllib.request import urlopen
+
+os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp"
+
+import cv2
+import numpy as np
+
+DEFAULT_GRABBER_URL = os.environ.get("FRAME_GRABBER_URL", "http://127.0.0.1:8765")
+DEFAULT_MAX_AGE = 2.0   # seconds; an older frame means cap.read() is stuck on a stalled stream
+
+
+class FrameGrabber:
+    """Keeps one RTSP connection open and decodes continuously into a small ring
+    of the most recent frames, reconnecting with exponential backoff."""
+
+    def __init__(self, rtsp_url, ring_size=4, min_backoff=0.5, max_backoff=30.0, max_age=DEFAULT_MAX_AGE):
+        self.rtsp_url = rtsp_url
+        self.max_age = max_age
+        self.frames = deque(maxlen=ring_size)   # (seq, timestamp, frame)
+        self.seq = 0
+        self.connected = False
+        self.reconnects = 0
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._jpeg_cache = (0, None)           # (seq, bytes), so repeated requests don't re-encode
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop_event.is_set():
+            cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if not cap.isOpened():
+                cap.release()
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                self.reconnects += 1
+                continue
+
+            self.connected = True
+            got_frame = False
+            while not self._stop_event.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                got_frame = True
+                with self._cond:
+                    self.seq += 1
+                    self.frames.append((self.seq, time.time(), frame))
+                    self._cond.notify_all()
+            cap.release()
+            self.connected = False
+
+            # Stream dropped: reconnect quickly if it was delivering frames, otherwise back off
+            backoff = self.min_backoff if got_frame else min(backoff * 2, self.max_backoff)
+            self.reconnects += 1
+            self._stop_event.wait(backoff)
+
+    def latest(self):
+        """Newest (seq, timestamp, frame), or None before the first frame arrives."""
+        with self._cond:
+            return self.frames[-1] if self.frames else None
+
+    def wait_for_frame(self, after_seq=0, timeout=5.0):
+        """Block until a frame newer than after_seq exists (or timeout); return it or None."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after_seq, timeout=timeout)
+            return self.frames[-1] if self.frames and self.seq > after_seq else None
+
+    def latest_fresh(self, max_age=None, timeout=5.0):
+        """Newest frame if it is at most max_age seconds old, otherwise wait up to timeout
+        for a new one. None if the stream is stalled (e.g. blocked inside cap.read())."""
+        max_age = self.max_age if max_age is None else max_age
+        item = self.latest()
+        if item is not None and time.time() - item[1] <= max_age:
+            return item
+        return self.wait_for_frame(after_seq=item[0] if item else 0, timeout=timeout)
+
+    def latest_jpeg(self, quality=90, max_age=None, timeout=5.0):
+        item = self.latest_fresh(max_age, timeout)
+        if item is None:
+            return None, None
+        seq, timestamp, frame = item
+        cached_seq, cached = self._jpeg_cache
+        if cached_seq != seq:
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                return None, None
+            cached = encoded.tobytes()
+            self._jpeg_cache = (seq, cached)
+        return cached, (seq, timestamp, frame.shape)
+
+    def status(self):
+        item = self.latest()
+        return {
+            "url": self.rtsp_url,
+            "connected": self.connected,
+            "frames": self.seq,
+            "reconnects": self.reconnects,
+            "age": round(time.time() - item[1], 3) if item else None
+        }
+
+
+# === HTTP SERVER (localhost) ===
+def make_handler(grabber):
+    class GrabberHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code, body, content_type='application/json', headers=None):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, code, data):
+            self._send(code, json.dumps(data).encode())
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            url = query.get('url', [None])[0]
+            if url and url != grabber.rtsp_url:
+                return self._send_json(404, {"success": False, "message": "Grabber serves another stream."})
+            max_age = float(query['max_age'][0]) if 'max_age' in query else None
+
+            if parsed.path == '/status':
+                return self._send_json(200, {"success": True, **grabber.status()})
+
+            if parsed.path == '/frame.jpg':
+                quality = int(query.get('quality', [90])[0])
+                data, info = grabber.latest_jpeg(quality=quality, max_age=max_age)
+                if data is None:
+                    return self._send_json(503, {"success": False, "message": "No fresh frame available."})
+                seq, timestamp, _ = info
+                return self._send(200, data, 'image/jpeg', {'X-Frame-Seq': str(seq), 'X-Frame-Time': str(timestamp)})
+
+            if parsed.path == '/frame.raw':
+                item = grabber.latest_fresh(max_age)
+                if item is None:
+                    return self._send_json(503, {"success": False, "message": "No fresh frame available."})
+                seq, timestamp, frame = item
+                return self._send(200, frame.tobytes(), 'application/octet-stream', {
+                    'X-Frame-Seq': str(seq),
+                    'X-Frame-Time': str(timestamp),
+                    'X-Frame-Shape': ','.join(map(str, frame.shape)),
+                    'X-Frame-Dtype': str(frame.dtype)
+                })
+
+            self._send_json(404, {"success": False, "message": "Unknown endpoint."})
+
+    return GrabberHandler
+
+
+# === CLIENT HELPERS ===
+def fetch_status(rtsp_url=None, grabber_url=DEFAULT_GRABBER_URL, timeout=1.0):
+    query = f"?url={quote(rtsp_url, safe='')}" if rtsp_url else ""
+    with urlopen(f"{grabber_url}/status{query}", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def fetch_jpeg(rtsp_url=None, grabber_url=DEFAULT_GRABBER_URL, timeout=6.0):
+    query = f"?url={quote(rtsp_url, safe='')}" if rtsp_url else ""
+    with urlopen(f"{grabber_url}/frame.jpg{query}", timeout=timeout) as response:
+        return response.read()
+
+
+def fetch_frame(rtsp_url=None, grabber_url=DEFAULT_GRABBER_URL, timeout=6.0):
+    """Latest frame as a BGR array, without JPEG encoding."""
+    query = f"?url={quote(rtsp_url, safe='')}" if rtsp_url else ""
+    with urlopen(f"{grabber_url}/frame.raw{query}", timeout=timeout) as response:
+        shape = tuple(int(v) for v in response.headers['X-Frame-Shape'].split(','))
+        dtype = np.dtype(response.headers['X-Frame-Dtype'])
+        return np.frombuffer(response.read(), dtype=dtype).reshape(shape)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Keep an RTSP stream open and serve the latest frame on localhost.')
+    parser.add_argument('rtsp_url')
+    parser.add_argument('--port', type=int, default=int(urlparse(DEFAULT_GRABBER_URL).port or 8765))
+    parser.add_argument('--ring', type=int, default=4, help='Number of recent frames kept.')
+    parser.add_argument('--max_age', type=float, default=DEFAULT_MAX_AGE, help='Refuse (503) frames older than this (s).')
+    args = parser.parse_args()
+
+    grabber = FrameGrabber(args.rtsp_url, ring_size=args.ring, max_age=args.max_age).start()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(grabber))
+    print(json.dumps({"event": "ready", "port": args.port}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        grabber.stop()
@@ -13,7 +13,13 @@ logging.getLogger('tensorflow').setLevel(logging.FATAL)
 # === KẾT THÚC KHỐI LỆNH ẨN CẢNH BÁO ===
 
 import json
-from deepface import DeepFace
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from face_index import IMAGE_EXTENSIONS, THRESHOLDS, represent, detect_faces, embed_faces
+from face_gallery import get_index
 
 def recognize_from_file(image_path, db_path):
     try:
@@ -22,28 +28,122 @@ def recognize_from_file(image_path, db_path):
 
         if not os.path.exists(db_path) or not any(os.scandir(db_path)):
             return {"success": True, "recognized": False, "message": "Face database is empty."}
-        
-        results = DeepFace.find(
-            img_path=image_path, 
-            db_path=db_path,
-            model_name='Facenet512',
-            detector_backend='ssd',
-            enforce_detection=False,
-            silent=True
-        )
-        
-        if results and not results[0].empty:
-            first_result = results[0].iloc[0]
-            identity_path = first_result['identity']
-            person_name = os.path.basename(os.path.dirname(identity_path))
-            return {"success": True, "recognized": True, "name": person_name}
+
+        index = get_index(db_path)
+        if len(index) == 0:
+            return {"success": True, "recognized": False, "message": "Face database is empty."}
+
+        best = None
+        for face in represent(image_path):
+            matches = index.query(face['embedding'], k=1)
+            if matches and (best is None or matches[0]['distance'] < best['distance']):
+                best = matches[0]
+
+        if best:
+            return {"success": True, "recognized": True, "name": best['name'], "distance": best['distance']}
         else:
             return {"success": True, "recognized": False, "message": "No matching face found"}
             
     except Exception as e:
         return {"success": False, "recognized": False, "message": f"An error occurred during recognition: {str(e)}"}
 
+# === BATCH MODE ===
+def expand_inputs(images):
+    """Flatten paths, directories, encoded buffers and arrays into a list of items to decode."""
+    items = []
+    for item in images:
+        if isinstance(item, str) and os.path.isdir(item):
+            items.extend(os.path.join(item, f) for f in sorted(os.listdir(item))
+                         if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            items.append(item)
+    return items
+
+
+def decode_image(item):
+    if isinstance(item, np.ndarray):
+        return item
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return cv2.imdecode(np.frombuffer(item, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imread(item)
+
+
+def fuse_results(per_image, threshold):
+    """Burst decision: each matched frame votes for its name, weighted by match margin."""
+    votes = {}
+    for result in per_image:
+        if result.get("recognized"):
+            votes[result["name"]] = votes.get(result["name"], 0.0) + (threshold - result["distance"])
+    if not votes:
+        return {"recognized": False, "message": "No matching face found"}
+    name = max(votes, key=votes.get)
+    matched = [r for r in per_image if r.get("recognized") and r["name"] == name]
+    return {
+        "recognized": True,
+        "name": name,
+        "distance": min(r["distance"] for r in matched),
+        "matched_frames": len(matched),
+        "votes": {k: round(v, 4) for k, v in votes.items()}
+    }
+
+
+def recognize_batch(images, db_path, threshold=None):
+    """Recognize a burst of frames (paths, directories, encoded buffers or BGR arrays).
+
+    Frames are decoded in a thread pool and face-detected one after another (the SSD net
+    is shared and not thread-safe); every face crop is then embedded in one batched
+    forward pass and matched against the gallery in one matrix product.
+    """
+    try:
+        if threshold is None:
+            threshold = THRESHOLDS['cosine']
+        items = expand_inputs(images)
+        if not items:
+            return {"success": False, "recognized": False, "message": "No images given."}
+
+        if not os.path.exists(db_path) or not any(os.scandir(db_path)):
+            return {"success": True, "recognized": False, "message": "Face database is empty."}
+        index = get_index(db_path)
+        if len(index) == 0:
+            return {"success": True, "recognized": False, "message": "Face database is empty."}
+
+        with ThreadPoolExecutor() as pool:
+            frames = list(pool.map(decode_image, items))
+        detections = [detect_faces(f) if f is not None else [] for f in frames]
+
+        faces, owners = [], []
+        for image_idx, face_objs in enumerate(detections):
+            for face_obj in face_objs:
+                faces.append(face_obj['face'])
+                owners.append(image_idx)
+
+        distances, indices = index.search(embed_faces(faces), k=1)
+
+        per_image = [{"image": i, "recognized": False, "faces": len(d)} for i, d in enumerate(detections)]
+        for i, frame in enumerate(frames):
+            if frame is None:
+                per_image[i]["message"] = "Cannot decode image"
+        for face_idx, image_idx in enumerate(owners):
+            if distances.shape[1] == 0:
+                break
+            distance = float(distances[face_idx, 0])
+            result = per_image[image_idx]
+            if distance <= threshold and (not result["recognized"] or distance < result["distance"]):
+                result.update({"recognized": True, "name": index.labels[indices[face_idx, 0]], "distance": distance})
+
+        fused = fuse_results(per_image, threshold)
+        return {"success": True, **fused, "frames": len(items), "results": per_image}
+
+    except Exception as e:
+        return {"success": False, "recognized": False, "message": f"An error occurred during batch recognition: {str(e)}"}
+
+
 if __name__ == "__main__":
-    result = recognize_from_file(sys.argv[1], sys.argv[2])
+    # recognize_face.py <image> <db_path>
+    # recognize_face.py --batch <db_path> <image|folder> [<image|folder> ...]
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        result = recognize_batch(sys.argv[3:], sys.argv[2])
+    else:
+        result = recognize_from_file(sys.argv[1], sys.argv[2])
     print(json.dumps(result))
     sys.exit(0) # Luôn thoát với code 0 cho nhận diện, vì "không tìm thấy" không phải là lỗi hệ thống
\ No newline at end of file
@@ -16,22 +16,25 @@ logging.getLogger('tensorflow').setLevel(logging.FATAL)
 
 import json
 import cv2
-from deepface import DeepFace
+from face_index import represent
+from face_gallery import register_embedding
 
-def register_face(name, image_path):
+def register_face(name, image_path, db_path=None):
     try:
         if not os.path.exists(image_path):
             return {"success": False, "message": f"File not found: {image_path}"}
-        
-        face_objects = DeepFace.extract_faces(
-            img_path=image_path, 
-            detector_backend='ssd',
-            enforce_detection=False
-        )
+
+        # Ảnh được lưu ở faces_db/<name>/<timestamp>.jpg
+        if db_path is None:
+            db_path = os.path.dirname(os.path.dirname(image_path))
+
+        face_objects = represent(image_path)
         
         num_faces = len(face_objects)
         
         if num_faces == 1:
+            # Lưu embedding vào gallery ngay, lần nhận diện sau không phải tính lại
+            register_embedding(db_path, name, image_path, face_objects[0]['embedding'])
             return {"success": True, "message": f"Valid face found for {name}. Registration successful."}
         elif num_faces == 0:
             return {"success": False, "message": "No face detected. Please ensure good lighting and face is clear."}
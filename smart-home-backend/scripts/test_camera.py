@@ -2,8 +2,19 @@
 import sys
 import cv2
 import json
+from frame_grabber import fetch_status
 
 def test_camera(rtsp_url):
+    # Nếu frame_grabber.py đang giữ stream thì chỉ cần hỏi trạng thái của nó
+    try:
+        status = fetch_status(rtsp_url)
+        if status["connected"] and status["frames"] > 0:
+            return {"success": True, "message": "Camera connected successfully"}
+    except (OSError, ValueError, KeyError):
+        pass
+    return test_camera_direct(rtsp_url)
+
+def test_camera_direct(rtsp_url):
     try:
         # Thay đổi tùy chọn kết nối sang TCP
         # Thêm biến môi trường để ưu tiên TCP
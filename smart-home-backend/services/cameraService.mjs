@@ -1,12 +1,32 @@
 import { spawn } from 'child_process';
 import path from 'path';
 import fs from 'fs';
+import { FaceWorker } from './faceWorkerService.mjs';
+import { FrameGrabber } from './frameGrabberService.mjs';
 
 export class CameraService {
     constructor() {
         this.faceDbPath = './faces_db';
         this.tempPath = './temp';
+        this.frameGrabberUrl = process.env.FRAME_GRABBER_URL || 'http://127.0.0.1:8765';
+        this.rtspUrl = process.env.CAMERA_RTSP_URL || '';
         this.ensureDirectoriesExist();
+
+        // Worker giữ model DeepFace trong bộ nhớ; script one-shot chỉ dùng khi worker chưa sẵn sàng
+        this.faceWorker = null;
+        if (process.env.FACE_WORKER !== 'off') {
+            this.faceWorker = new FaceWorker(this.faceDbPath, {
+                workers: Number(process.env.FACE_WORKER_THREADS) || 2
+            });
+            this.faceWorker.start();
+        }
+
+        // frame_grabber.py giữ stream RTSP luôn mở để lấy frame mới nhất tức thì
+        this.frameGrabber = null;
+        if (this.rtspUrl && process.env.FRAME_GRABBER !== 'off') {
+            this.frameGrabber = new FrameGrabber(this.rtspUrl, this.frameGrabberUrl);
+            this.frameGrabber.start();
+        }
     }
 
     ensureDirectoriesExist() {
@@ -18,23 +38,10 @@ export class CameraService {
         }
     }
 
-
-    // Thay thế hàm registerPerson cũ bằng hàm đã được sửa lỗi triệt để này
-    async registerPerson(name, imageBuffer) {
-        return new Promise((resolve, reject) => {
-            const personDir = path.join(this.faceDbPath, name);
-            if (!fs.existsSync(personDir)) {
-                fs.mkdirSync(personDir, { recursive: true });
-            }
-
-            const imagePath = path.join(personDir, `${Date.now()}.jpg`);
-            fs.writeFileSync(imagePath, imageBuffer);
-
-            const python = spawn('python', [
-                './scripts/register_face.py',
-                name,
-                imagePath
-            ]);
+    // Chạy một script Python one-shot và gom stdout/stderr
+    runScript(args) {
+        return new Promise((resolve) => {
+            const python = spawn('python', args);
 
             let stdoutData = '';
             let stderrData = '';
@@ -48,74 +55,167 @@ export class CameraService {
             });
 
             python.on('close', (code) => {
-                try {
-                    const result = JSON.parse(stdoutData.trim());
-                    
-                    if (code === 0 && result.success) { // Nếu script chạy thành công VÀ trả về success: true
-                        if (stderrData) console.warn(`Python Warnings (register_face): ${stderrData}`);
-                        resolve(result); // Trả về kết quả thành công
-                    } else { // Nếu script chạy lỗi HOẶC trả về success: false
-                        // **LOGIC SỬA LỖI QUAN TRỌNG: Xóa file ảnh không hợp lệ**
-                        if (fs.existsSync(imagePath)) {
-                            fs.unlinkSync(imagePath);
-                        }
-                        console.error(`Python Error or logical failure (register_face): ${stderrData || result.message}`);
-                        reject(result); // Reject promise với thông báo lỗi chi tiết từ Python
-                    }
-                } catch (e) {
-                    // Nếu không parse được JSON -> Lỗi nghiêm trọng
-                    if (fs.existsSync(imagePath)) {
-                        fs.unlinkSync(imagePath);
-                    }
-                    console.error(`Failed to parse Python output: ${stdoutData}. Stderr: ${stderrData}`);
-                    reject({ success: false, message: "Internal script error." });
-                }
+                resolve({ code, stdoutData, stderrData });
             });
         });
     }
+
+    // Gửi job tới worker; nếu worker chưa sẵn sàng hoặc lỗi thì quay về script one-shot
+    async runFaceJob(cmd, payload, fallbackArgs) {
+        if (this.faceWorker && this.faceWorker.isReady()) {
+            try {
+                const result = await this.faceWorker.request(cmd, payload);
+                return { code: result.success || cmd !== 'register' ? 0 : 1, result, stderrData: '' };
+            } catch (error) {
+                console.warn(`Face worker failed (${cmd}), falling back to one-shot script: ${error.message}`);
+            }
+        }
+
+        const { code, stdoutData, stderrData } = await this.runScript(fallbackArgs);
+        let result = null;
+        try {
+            result = JSON.parse(stdoutData.trim());
+        } catch (e) {
+            console.error(`Failed to parse Python output: ${stdoutData}. Stderr: ${stderrData}`);
+        }
+        return { code, result, stderrData };
+    }
+
+
+    // Thay thế hàm registerPerson cũ bằng hàm đã được sửa lỗi triệt để này
+    async registerPerson(name, imageBuffer) {
+        const personDir = path.join(this.faceDbPath, name);
+        if (!fs.existsSync(personDir)) {
+            fs.mkdirSync(personDir, { recursive: true });
+        }
+
+        const imagePath = path.join(personDir, `${Date.now()}.jpg`);
+        fs.writeFileSync(imagePath, imageBuffer);
+
+        const { code, result, stderrData } = await this.runFaceJob(
+            'register',
+            { name, image_path: imagePath },
+            ['./scripts/register_face.py', name, imagePath]
+        );
+
+        if (!result) {
+            // Nếu không parse được JSON -> Lỗi nghiêm trọng
+            if (fs.existsSync(imagePath)) {
+                fs.unlinkSync(imagePath);
+            }
+            throw { success: false, message: "Internal script error." };
+        }
+
+        if (code === 0 && result.success) { // Nếu script chạy thành công VÀ trả về success: true
+            if (stderrData) console.warn(`Python Warnings (register_face): ${stderrData}`);
+            return result; // Trả về kết quả thành công
+        }
+
+        // **LOGIC SỬA LỖI QUAN TRỌNG: Xóa file ảnh không hợp lệ**
+        if (fs.existsSync(imagePath)) {
+            fs.unlinkSync(imagePath);
+        }
+        console.error(`Python Error or logical failure (register_face): ${stderrData || result.message}`);
+        throw result; // Reject promise với thông báo lỗi chi tiết từ Python
+    }
     
     
     async recognizeFaceFromFile(imageBuffer) {
-        return new Promise((resolve, reject) => {
-            const tempImagePath = path.join(this.tempPath, `rec_${Date.now()}.jpg`);
-            fs.writeFileSync(tempImagePath, imageBuffer);
+        const tempImagePath = path.join(this.tempPath, `rec_${Date.now()}_${Math.random().toString(36).substring(2, 6)}.jpg`);
+        fs.writeFileSync(tempImagePath, imageBuffer);
 
-            const python = spawn('python', [
-                './scripts/recognize_face.py',
-                tempImagePath,
-                this.faceDbPath
-            ]);
+        try {
+            const { code, result, stderrData } = await this.runFaceJob(
+                'recognize',
+                { image_path: tempImagePath, db_path: this.faceDbPath },
+                ['./scripts/recognize_face.py', tempImagePath, this.faceDbPath]
+            );
 
-            let stdoutData = '';
-            let stderrData = '';
+            if (code === 0) { // Thành công
+                if (stderrData) {
+                    console.warn(`Python Warnings (recognize_face): ${stderrData}`);
+                }
+                if (!result) {
+                    throw { success: false, message: 'Failed to parse Python success result.' };
+                }
+                return result;
+            }
+            // Thất bại
+            console.error(`Python Error (recognize_face): ${stderrData}`);
+            throw { success: false, message: `Recognition script failed with exit code ${code}.` };
+        } finally {
+            if (fs.existsSync(tempImagePath)) {
+                fs.unlinkSync(tempImagePath);
+            }
+        }
+    }
 
-            python.stdout.on('data', (data) => {
-                stdoutData += data.toString();
-            });
+    // Nhận diện một loạt frame (burst) trong một lần gọi; trả về kết quả từng ảnh và quyết định chung
+    async recognizeBurst(imageBuffers) {
+        const stamp = `${Date.now()}_${Math.random().toString(36).substring(2, 6)}`;
+        const imagePaths = imageBuffers.map((buffer, i) => {
+            const imagePath = path.join(this.tempPath, `burst_${stamp}_${i}.jpg`);
+            fs.writeFileSync(imagePath, buffer);
+            return imagePath;
+        });
 
-            python.stderr.on('data', (data) => {
-                stderrData += data.toString();
-            });
+        try {
+            const { code, result, stderrData } = await this.runFaceJob(
+                'recognize_batch',
+                { image_paths: imagePaths, db_path: this.faceDbPath },
+                ['./scripts/recognize_face.py', '--batch', this.faceDbPath, ...imagePaths]
+            );
 
-            python.on('close', (code) => {
-                if (fs.existsSync(tempImagePath)) {
-                    fs.unlinkSync(tempImagePath);
-                }
-                
-                if (code === 0) { // Thành công
-                    if (stderrData) {
-                        console.warn(`Python Warnings (recognize_face): ${stderrData}`);
-                    }
-                    try {
-                        resolve(JSON.parse(stdoutData.trim()));
-                    } catch (error) {
-                        reject({ success: false, message: 'Failed to parse Python success result.' });
-                    }
-                } else { // Thất bại
-                    console.error(`Python Error (recognize_face): ${stderrData}`);
-                    reject({ success: false, message: `Recognition script failed with exit code ${code}.` });
+            if (code === 0 && result) {
+                return result;
+            }
+            console.error(`Python Error (recognize_face --batch): ${stderrData}`);
+            throw { success: false, message: `Batch recognition failed with exit code ${code}.` };
+        } finally {
+            for (const imagePath of imagePaths) {
+                if (fs.existsSync(imagePath)) {
+                    fs.unlinkSync(imagePath);
                 }
-            });
-        });
+            }
+        }
+    }
+
+    // Lấy frame mới nhất từ scripts/frame_grabber.py (stream RTSP luôn mở sẵn);
+    // nếu grabber chưa chạy hoặc stream bị treo thì chụp trực tiếp bằng capture_frame.py
+    async getLiveFrame() {
+        try {
+            const response = await fetch(`${this.frameGrabberUrl}/frame.jpg`);
+            if (response.ok) {
+                return Buffer.from(await response.arrayBuffer());
+            }
+            console.warn(`Frame grabber returned ${response.status}, capturing directly`);
+        } catch (error) {
+            console.warn(`Frame grabber unavailable (${error.message}), capturing directly`);
+        }
+        return this.captureFrameDirect();
+    }
+
+    async captureFrameDirect() {
+        if (!this.rtspUrl) {
+            throw new Error('CAMERA_RTSP_URL is not set');
+        }
+        const framePath = path.join(this.tempPath, `frame_${Date.now()}_${Math.random().toString(36).substring(2, 6)}.jpg`);
+        try {
+            const { stdoutData, stderrData } = await this.runScript(['./scripts/capture_frame.py', this.rtspUrl, framePath]);
+            let result = null;
+            try {
+                result = JSON.parse(stdoutData.trim());
+            } catch (e) {
+                throw new Error(`Failed to parse capture_frame output: ${stdoutData}. Stderr: ${stderrData}`);
+            }
+            if (!result.success || !fs.existsSync(framePath)) {
+                throw new Error(result.message || 'Failed to capture frame');
+            }
+            return fs.readFileSync(framePath);
+        } finally {
+            if (fs.existsSync(framePath)) {
+                fs.unlinkSync(framePath);
+            }
+        }
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,136 @@
+// services/faceWorkerService.mjs
+import { spawn } from 'child_process';
+import readline from 'readline';
+import logger from '../utils/logger.mjs';
+
+/**
+ * Keeps one scripts/face_worker.py process alive so DeepFace models are
+ * loaded once instead of on every register/recognize call.
+ * Jobs and results are JSON lines over the worker's stdin/stdout.
+ */
+export class FaceWorker {
+    constructor(dbPath, options = {}) {
+        this.dbPath = dbPath;
+        this.pythonCmd = options.pythonCmd || 'python';
+        this.scriptPath = options.scriptPath || './scripts/face_worker.py';
+        this.workers = options.workers || 2;
+        this.jobTimeout = options.jobTimeout || 30000;
+        this.restartDelay = 1000;      // Base restart delay in ms
+        this.maxRestartDelay = 30000;
+
+        this.process = null;
+        this.ready = false;
+        this.stopped = false;
+        this.nextId = 1;
+        this.pending = new Map();
+    }
+
+    start() {
+        if (this.process) return;
+        this.stopped = false;
+
+        const python = spawn(this.pythonCmd, [
+            this.scriptPath,
+            '--db', this.dbPath,
+            '--workers', String(this.workers)
+        ]);
+        this.process = python;
+
+        readline.createInterface({ input: python.stdout }).on('line', (line) => this.handleLine(line));
+
+        python.stderr.on('data', (data) => {
+            logger.debug(`face_worker: ${data.toString().trim()}`);
+        });
+
+        python.on('error', (error) => {
+            logger.error(`Failed to start face worker: ${error.message}`);
+        });
+
+        // Writing a job after Python died (before 'close' fires) raises EPIPE here;
+        // without a listener it would be an uncaught exception in the backend.
+        python.stdin.on('error', (error) => {
+            logger.warn(`Face worker stdin error: ${error.message}`);
+        });
+
+        python.on('close', (code) => {
+            this.process = null;
+            this.ready = false;
+            this.failPending(`Face worker exited with code ${code}`);
+
+            if (!this.stopped) {
+                logger.warn(`Face worker exited with code ${code}, restarting in ${this.restartDelay}ms`);
+                setTimeout(() => this.start(), this.restartDelay);
+                this.restartDelay = Math.min(this.restartDelay * 2, this.maxRestartDelay);
+            }
+        });
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.process) {
+            this.process.stdin.write(JSON.stringify({ cmd: 'shutdown' }) + '\n');
+        }
+    }
+
+    isReady() {
+        return this.ready && this.process !== null;
+    }
+
+    handleLine(line) {
+        let message;
+        try {
+            message = JSON.parse(line);
+        } catch (error) {
+            logger.warn(`Ignoring non-JSON face worker output: ${line}`);
+            return;
+        }
+
+        if (message.event === 'ready') {
+            this.ready = true;
+            this.restartDelay = 1000;
+            logger.info(`Face worker ready (pid ${message.pid}, ${message.workers} workers)`);
+            return;
+        }
+        if (message.event) {
+            logger.info(`Face worker event: ${message.event} ${message.message || ''}`);
+            return;
+        }
+
+        const job = this.pending.get(message.id);
+        if (!job) return;
+        clearTimeout(job.timer);
+        this.pending.delete(message.id);
+        job.resolve(message.result);
+    }
+
+    failPending(reason) {
+        for (const job of this.pending.values()) {
+            clearTimeout(job.timer);
+            job.reject(new Error(reason));
+        }
+        this.pending.clear();
+    }
+
+    /**
+     * Send a job to the worker
+     * @param {String} cmd - 'recognize' or 'register'
+     * @param {Object} payload - Job arguments (image_path, name, ...)
+     * @returns {Promise<Object>} - The result object printed by the Python side
+     */
+    request(cmd, payload = {}) {
+        return new Promise((resolve, reject) => {
+            if (!this.isReady()) {
+                return reject(new Error('Face worker is not ready'));
+            }
+
+            const id = this.nextId++;
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`Face worker job ${id} (${cmd}) timed out`));
+            }, this.jobTimeout);
+
+            this.pending.set(id, { resolve, reject, timer });
+            this.process.stdin.write(JSON.stringify({ id, cmd, ...payload }) + '\n');
+        });
+    }
+}
@@ -0,0 +1,74 @@
+// services/frameGrabberService.mjs
+import { spawn } from 'child_process';
+import readline from 'readline';
+import logger from '../utils/logger.mjs';
+
+/**
+ * Keeps one scripts/frame_grabber.py process alive so the RTSP stream stays
+ * open and the latest frame can be fetched from its localhost HTTP endpoint.
+ * Restarted with exponential backoff if it exits, like FaceWorker.
+ */
+export class FrameGrabber {
+    constructor(rtspUrl, grabberUrl, options = {}) {
+        this.rtspUrl = rtspUrl;
+        this.port = new URL(grabberUrl).port || '8765';
+        this.pythonCmd = options.pythonCmd || 'python';
+        this.scriptPath = options.scriptPath || './scripts/frame_grabber.py';
+        this.restartDelay = 1000;      // Base restart delay in ms
+        this.maxRestartDelay = 30000;
+
+        this.process = null;
+        this.ready = false;
+        this.stopped = false;
+    }
+
+    start() {
+        if (this.process) return;
+        this.stopped = false;
+
+        const python = spawn(this.pythonCmd, [this.scriptPath, this.rtspUrl, '--port', String(this.port)]);
+        this.process = python;
+
+        readline.createInterface({ input: python.stdout }).on('line', (line) => {
+            try {
+                if (JSON.parse(line).event === 'ready') {
+                    this.ready = true;
+                    this.restartDelay = 1000;
+                    logger.info(`Frame grabber ready on port ${this.port} (pid ${python.pid})`);
+                }
+            } catch (error) {
+                logger.debug(`frame_grabber: ${line}`);
+            }
+        });
+
+        python.stderr.on('data', (data) => {
+            logger.debug(`frame_grabber: ${data.toString().trim()}`);
+        });
+
+        python.on('error', (error) => {
+            logger.error(`Failed to start frame grabber: ${error.message}`);
+        });
+
+        python.on('close', (code) => {
+            this.process = null;
+            this.ready = false;
+
+            if (!this.stopped) {
+                logger.warn(`Frame grabber exited with code ${code}, restarting in ${this.restartDelay}ms`);
+                setTimeout(() => this.start(), this.restartDelay);
+                this.restartDelay = Math.min(this.restartDelay * 2, this.maxRestartDelay);
+            }
+        });
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.process) {
+            this.process.kill();
+        }
+    }
+
+    isReady() {
+        return this.ready && this.process !== null;
+    }
+}